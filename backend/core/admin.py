@@ -1,9 +1,13 @@
 from django.contrib import admin
+from core.services import delete_entity_with_items
 
 
 class ItemAdminMixin(admin.ModelAdmin):
     """
     Mixin base para admins de itens (SaleItem, PurchaseItem).
+    
+    Somente leitura: os itens são criados e removidos pelos services, que mantêm
+    o atendimento e os totais diários das vendas consistentes.
     """
     list_display = ['id', 'get_parent', 'product', 'quantity']
     search_fields = ['product__name']
@@ -16,4 +20,28 @@ class ItemAdminMixin(admin.ModelAdmin):
             return obj.purchase
         return None
     get_parent.short_description = 'Relacionado'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
+class EntityAdminMixin(admin.ModelAdmin):
+    """
+    Mixin base para admins de entidades com itens (Sale, Purchase).
+    
+    As remoções passam por delete_entity_with_items, como na API.
+    """
+    parent_field = None
+    
+    def delete_model(self, request, obj):
+        delete_entity_with_items(obj, self.parent_field)
+    
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            delete_entity_with_items(obj, self.parent_field)
@@ -0,0 +1,92 @@
+"""
+Base das views assíncronas (somente leitura) servidas via ASGI.
+
+As views async usam o ORM assíncrono do Django e os mesmos serializers das views DRF,
+sem ocupar uma thread por requisição em andamento. Sob WSGI elas também funcionam,
+mas cada requisição roda em um event loop próprio, sem ganho.
+"""
+from functools import wraps
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from core.authentication import CachedJWTAuthentication
+
+
+def json_response(data, status=200):
+    """Renderiza os dados com o JSONRenderer do DRF (mesmo formato das views DRF)."""
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def unsupported_params_response(request, supported=('page',)):
+    """
+    Resposta 400 se a requisição tiver parâmetros de query que só as views DRF suportam
+    (filtros, ?fields=, ?expand=, ?pagination=, ?cursor= etc.); None caso contrário.
+    
+    Ignorá-los retornaria silenciosamente dados diferentes dos da view DRF.
+    """
+    unsupported = sorted(set(request.GET) - set(supported))
+    if unsupported:
+        return json_response(
+            {'detail': f"Parâmetros não suportados nas views async: {', '.join(unsupported)}."}, status=400
+        )
+    return None
+
+
+def async_jwt_required(view):
+    """Decorator de views async: autentica via JWT e define request.user, ou retorna 401."""
+    authentication = CachedJWTAuthentication()
+    
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await authentication.aauthenticate(request)
+        except (AuthenticationFailed, InvalidToken) as e:
+            # Mesmo formato do exception handler do DRF
+            return json_response(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, status=401)
+        if result is None:
+            return json_response({'detail': 'As credenciais de autenticação não foram fornecidas.'}, status=401)
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def paginated_response(request, queryset, serializer_class):
+    """
+    Pagina por página (?page=) com o mesmo formato de resposta das listagens DRF.
+    
+    A paginação por cursor não está disponível nas views async.
+    """
+    error = unsupported_params_response(request)
+    if error is not None:
+        return error
+    
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+    
+    count = await queryset.acount()
+    last_page = max(1, -(-count // page_size))
+    if page < 1 or page > last_page:
+        return json_response({'detail': 'Página inválida.'}, status=404)
+    
+    offset = (page - 1) * page_size
+    objects = [obj async for obj in queryset[offset:offset + page_size]]
+    
+    url = request.build_absolute_uri()
+    previous_url = None
+    if page > 1:
+        previous_url = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    
+    data = {
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+        'previous': previous_url,
+        'results': serializer_class(objects, many=True).data,
+    }
+    response = json_response(data)
+    response.data = data  # Dados não renderizados, para cache
+    return response
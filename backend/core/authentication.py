@@ -0,0 +1,110 @@
+"""
+Autenticação JWT sem consulta ao banco a cada requisição.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Cache em memória (por processo) de usuários, com TTL curto e tamanho limitado (LRU).
+    
+    Alterações de usuário invalidam a entrada no processo atual (core.signals); nos demais
+    processos a entrada expira pelo TTL (AUTH_USER_CACHE_TTL).
+    """
+    
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+    
+    def set(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + settings.AUTH_USER_CACHE_TTL, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.AUTH_USER_CACHE_SIZE:
+                self._users.popitem(last=False)
+    
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication com o usuário em cache (UserCache), evitando a query do usuário.
+    
+    request.user continua sendo uma instância de User (cópia da entrada em cache), de
+    forma que perform_create e os querysets filtrados por usuário não mudam. As mesmas
+    verificações do JWTAuthentication (usuário ativo, senha alterada) valem para o cache.
+    """
+    
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(validated_token.get(api_settings.USER_ID_CLAIM), user)
+            user = copy.copy(user)
+        return user
+    
+    def get_cached_user(self, validated_token):
+        """Retorna o usuário do cache (após as verificações), ou None se não estiver em cache"""
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            return None
+        
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        
+        return copy.copy(user)
+    
+    async def aauthenticate(self, request):
+        """
+        Versão assíncrona de authenticate, para views async.
+        
+        Com o usuário em cache não há I/O; caso contrário a consulta roda em thread (sync_to_async).
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = await sync_to_async(self.get_user)(validated_token)
+        return user, validated_token
@@ -0,0 +1,309 @@
+"""
+Benchmark dos endpoints da API sobre dados semeados em escala.
+
+Usado pelo comando benchmark_endpoints. As funções também podem ser chamadas
+em testes, sobre o banco de teste.
+"""
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from factory.random import reseed_random
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.factories import ProductFactory, UserFactory
+from core.services import create_entities_bulk
+from core.urls import router
+from products.models import Product
+from sales.models import Sale, SaleItem
+from purchases.models import Purchase, PurchaseItem
+
+
+DEFAULT_SCALE = {
+    'users': 5,
+    'products': 200,  # por usuário
+    'sales': 200,  # por usuário
+    'items': 5,  # por venda
+    'purchases': 2,  # por venda
+}
+
+
+def seed(scale, seed_value=42):
+    """
+    Semeia usuários, produtos, vendas e compras.
+    
+    Args:
+        scale: Dicionário com users, products, sales, items e purchases (ver DEFAULT_SCALE)
+        seed_value: Semente do gerador aleatório, para dados reproduzíveis
+    
+    Returns:
+        list: Usuários criados
+    """
+    reseed_random(seed_value)
+    rng = random.Random(seed_value)
+    
+    users = UserFactory.create_batch(scale['users'])
+    for user in users:
+        Product.objects.bulk_create(ProductFactory.build_batch(scale['products'], user=user), batch_size=1000)
+        product_ids = list(Product.objects.filter(user=user).values_list('id', flat=True))
+        items_per_sale = min(scale['items'], len(product_ids))
+        
+        sales = create_entities_bulk(
+            entity_model=Sale,
+            item_model=SaleItem,
+            parent_field='sale',
+            user=user,
+            entities_data=[
+                {'items': [
+                    {'product_id': product_id, 'quantity': rng.randint(1, 10)}
+                    for product_id in rng.sample(product_ids, items_per_sale)
+                ]}
+                for _ in range(scale['sales'])
+            ]
+        )
+        
+        # Compras parciais: cada compra atende 1 unidade de alguns produtos da venda
+        sale_products = {}
+        for sale_id, product_id in SaleItem.objects.filter(sale_id__in=sales['created']).values_list('sale_id', 'product_id'):
+            sale_products.setdefault(sale_id, []).append(product_id)
+        create_entities_bulk(
+            entity_model=Purchase,
+            item_model=PurchaseItem,
+            parent_field='purchase',
+            user=user,
+            entities_data=[
+                {'sale_id': sale_id, 'items': [
+                    {'product_id': product_id, 'quantity': 1}
+                    for product_id in rng.sample(product_ids_of_sale, max(1, len(product_ids_of_sale) // 2))
+                ]}
+                for sale_id, product_ids_of_sale in sale_products.items()
+                for _ in range(scale['purchases'])
+            ],
+            entity_fields=('sale_id',)
+        )
+    return users
+
+
+def get_endpoints(user):
+    """
+    Lista os endpoints GET do router, incluindo as ações customizadas.
+    
+    Returns:
+        list: [(nome, url), ...]
+    """
+    detail_objects = {
+        'product': Product.objects.filter(user=user).first(),
+        'sale': Sale.objects.filter(purchases__isnull=False).first(),
+        'purchase': Purchase.objects.first(),
+    }
+    # Ações que dependem de parâmetros (o autocomplete sem ?search= não consulta o banco)
+    list_params = {}
+    if detail_objects['product'] is not None:
+        list_params['product-autocomplete'] = {'search': detail_objects['product'].name[:3]}
+    
+    endpoints = []
+    for _, viewset, basename in router.registry:
+        obj = detail_objects.get(basename)
+        endpoints.append((f'{basename}-list', reverse(f'{basename}-list')))
+        if obj is not None:
+            endpoints.append((f'{basename}-detail', reverse(f'{basename}-detail', kwargs={'pk': obj.pk})))
+        
+        for extra_action in viewset.get_extra_actions():
+            if 'get' not in extra_action.mapping:
+                continue
+            name = f'{basename}-{extra_action.url_name}'
+            if extra_action.detail:
+                if obj is not None:
+                    endpoints.append((name, reverse(name, kwargs={'pk': obj.pk})))
+            else:
+                url = reverse(name)
+                if name in list_params:
+                    url = f'{url}?{urlencode(list_params[name])}'
+                endpoints.append((name, url))
+    return endpoints
+
+
+def run_benchmarks(user, repeat=10, warm_cache=False):
+    """
+    Mede tempo, número de queries e tamanho da resposta de cada endpoint.
+    
+    Args:
+        user: Usuário autenticado nas requisições (via JWT)
+        repeat: Quantidade de execuções por endpoint
+        warm_cache: Mantém o cache de respostas entre as execuções (por padrão é limpo
+            antes de cada uma, para medir o custo completo da view)
+    
+    Returns:
+        dict: {nome: {url, status, median_ms, p95_ms, min_ms, queries, bytes}}
+    """
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    
+    results = {}
+    for name, url in get_endpoints(user):
+        timings = []
+        for _ in range(repeat):
+            if not warm_cache:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                timings.append((time.perf_counter() - started) * 1000)
+        
+        timings.sort()
+        results[name] = {
+            'url': url,
+            'status': response.status_code,
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            'min_ms': round(timings[0], 2),
+            'queries': len(queries),
+            'bytes': len(content),
+        }
+    return results
+
+
+def compare_reports(baseline, current, threshold=0.2, min_delta_ms=1.0):
+    """
+    Compara dois relatórios de benchmark.
+    
+    Args:
+        baseline: Relatório de referência
+        current: Relatório atual
+        threshold: Aumento relativo de tempo (mediana) considerado regressão
+        min_delta_ms: Aumento absoluto mínimo (ms), para ignorar ruído em endpoints rápidos
+    
+    Returns:
+        list: [(nome, mediana anterior, mediana atual, queries anteriores, queries atuais, regressão)]
+    """
+    rows = []
+    for name, result in current['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        regression = (
+            result['median_ms'] > previous['median_ms'] * (1 + threshold)
+            and result['median_ms'] - previous['median_ms'] >= min_delta_ms
+            or result['queries'] > previous['queries']
+        )
+        rows.append((name, previous['median_ms'], result['median_ms'], previous['queries'], result['queries'], regression))
+    return rows
+
+
+@contextmanager
+def seeded_test_database(scale, seed_value=42, keepdb=False):
+    """
+    Cria um banco de teste descartável, semeia os dados e o remove ao sair.
+    
+    Yields:
+        tuple: (nome do banco de teste, usuários criados)
+    """
+    old_name = connection.settings_dict['NAME']
+    test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield test_name, seed(scale, seed_value=seed_value)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+@contextmanager
+def run_server(command, port, env=None, timeout=30):
+    """
+    Sobe um servidor HTTP em subprocesso (ex.: gunicorn, uvicorn) e aguarda a porta.
+    
+    Args:
+        command: Comando do servidor
+        port: Porta local em que o servidor escuta
+        env: Variáveis de ambiente adicionais (ex.: DB_NAME do banco de teste)
+    """
+    server = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f'Servidor encerrou com código {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'Servidor não respondeu na porta {port}')
+                time.sleep(0.2)
+        yield server
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def run_load(port, path, token, concurrency, total, warmup=True):
+    """
+    Dispara total requisições GET com concurrency conexões keep-alive simultâneas.
+    
+    Com warmup, uma rodada inicial não medida (duas requisições por conexão) aquece o
+    servidor (imports, conexões com o banco, caches).
+    
+    Returns:
+        dict: path, requests_per_second, median_ms, p95_ms e errors (respostas diferentes de 200)
+    """
+    if warmup:
+        _fire_requests(port, path, token, concurrency, concurrency * 2)
+    latencies, errors, elapsed = _fire_requests(port, path, token, concurrency, total)
+    
+    latencies.sort()
+    return {
+        'path': path,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'median_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 2),
+        'errors': len(errors),
+    }
+
+
+def _fire_requests(port, path, token, concurrency, total):
+    """Executa as requisições e retorna (latências, status de erro, duração total)."""
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = iter(range(total))
+    
+    def worker():
+        client = http.client.HTTPConnection('localhost', port, timeout=60)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                started = time.perf_counter()
+                client.request('GET', path, headers=headers)
+                response = client.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status != 200:
+                        errors.append(response.status)
+        finally:
+            client.close()
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - started
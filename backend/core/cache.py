@@ -0,0 +1,69 @@
+"""
+Versões de dados e cache de respostas por usuário.
+
+Cada namespace (o app_label: 'products', 'sales', 'purchases') tem um contador de versão
+global e um por usuário, atualizados a cada alteração dos dados. As versões são usadas
+nas chaves do cache de respostas e nos ETags/Last-Modified das respostas: atualizá-las
+invalida todas as respostas anteriores sem precisar conhecê-las.
+
+As versões são timestamps em nanossegundos, de forma que uma versão removida do cache
+nunca volta a um valor já usado e a maior versão serve de data de última alteração.
+Elas ficam no cache 'versions', compartilhado entre os processos (ver core.checks), e as
+respostas no cache padrão.
+"""
+import hashlib
+import time
+from django.core.cache import caches
+from django.db import connection, transaction
+
+
+def _versions():
+    return caches['versions']
+
+
+def _version_key(namespace, user_id):
+    return f'version:{namespace}:{"all" if user_id is None else user_id}'
+
+
+def get_version(namespace, user_id=None):
+    """Retorna a versão atual do namespace (global, ou do usuário com user_id)."""
+    key = _version_key(namespace, user_id)
+    versions = _versions()
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, time.time_ns(), timeout=None)
+        version = versions.get(key)
+    return version
+
+
+def bump_version(namespace, user_id=None):
+    """Atualiza a versão do namespace (global, ou do usuário com user_id)."""
+    key = _version_key(namespace, user_id)
+    versions = _versions()
+    current = versions.get(key) or 0
+    versions.set(key, max(time.time_ns(), current + 1), timeout=None)
+
+
+def invalidate(namespace, user_id=None):
+    """
+    Atualiza as versões global e do usuário do namespace.
+
+    Dentro de uma transação, atualiza também após o commit: respostas geradas por
+    leituras concorrentes antes do commit (com os dados antigos) ficam invalidadas.
+    """
+    def bump():
+        bump_version(namespace)
+        if user_id is not None:
+            bump_version(namespace, user_id)
+
+    bump()
+    if connection.in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def response_cache_key(namespace, user_id, request, action):
+    """Chave da resposta: namespace, usuário, versão, ação, host, caminho e query string."""
+    version = get_version(namespace, user_id)
+    query = request.META.get('QUERY_STRING', '')
+    digest = hashlib.md5(f'{request.get_host()}{request.path}?{query}'.encode()).hexdigest()
+    return f'response:{namespace}:{user_id}:{version}:{action}:{digest}'
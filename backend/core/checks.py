@@ -0,0 +1,25 @@
+"""
+Verificações de configuração do projeto (manage.py check).
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_version_cache(app_configs, **kwargs):
+    """As versões dos dados (core.cache) precisam de um cache compartilhado entre processos."""
+    backend = settings.CACHES.get('versions', {}).get('BACKEND')
+    if backend is None or backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            'O cache "versions" deve ser compartilhado entre processos.',
+            hint='Use VERSION_CACHE_BACKEND com FileBasedCache, Redis ou Memcached.',
+            obj='CACHES',
+            id='core.E001',
+        )]
+    return []
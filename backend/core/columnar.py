@@ -0,0 +1,145 @@
+"""
+Formato colunar para listas grandes (?format=columnar ou Accept: application/vnd.hubbi.columnar+json).
+
+Cada lista de objetos vira {"columns": [...], "rows": [[...], ...]}: os nomes dos campos
+aparecem uma vez por lista em vez de uma vez por registro. Objetos aninhados viram colunas
+com ponto ("product.name") e listas aninhadas (ex.: itens) têm as colunas declaradas uma
+vez no cabeçalho ({"items": [...]}), com cada linha trazendo só os valores. O parser faz a
+conversão inversa, para envios em lote no mesmo formato.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.hubbi.columnar+json'
+
+
+def to_columnar(data):
+    """Converte as listas de objetos de data (em qualquer nível) em tabelas colunares."""
+    if _is_table(data):
+        columns, rows = _encode_table(data)
+        return {'columns': columns, 'rows': rows}
+    if isinstance(data, list):
+        return [to_columnar(value) for value in data]
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    return data
+
+
+def _is_table(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+
+def _flatten(record, prefix=''):
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def _encode_table(records):
+    """
+    Colunas e linhas de uma lista de objetos.
+
+    Uma coluna cujos valores são listas de objetos (ex.: itens) é declarada como
+    {"items": [colunas dos itens]} e cada linha traz só as linhas dos itens.
+    """
+    flat_records = [_flatten(record) for record in records]
+    names = list(dict.fromkeys(name for record in flat_records for name in record))
+    columns, cells_by_column = [], []
+    for name in names:
+        cells = [record.get(name) for record in flat_records]
+        if any(_is_table(cell) for cell in cells) and all(cell in (None, []) or _is_table(cell) for cell in cells):
+            sub_columns, sub_rows = _encode_table([child for cell in cells if cell for child in cell])
+            split, start = [], 0
+            for cell in cells:
+                size = len(cell) if cell else 0
+                split.append(None if cell is None else sub_rows[start:start + size])
+                start += size
+            columns.append({name: sub_columns})
+            cells_by_column.append(split)
+        else:
+            columns.append(name)
+            cells_by_column.append([to_columnar(cell) for cell in cells])
+    return columns, [list(row) for row in zip(*cells_by_column)] if columns else [[] for _ in records]
+
+
+def from_columnar(data):
+    """Converte as tabelas colunares de data (em qualquer nível) de volta em listas de objetos."""
+    if isinstance(data, dict):
+        if set(data) == {'columns', 'rows'}:
+            return _decode_table(data['columns'], data['rows'])
+        return {key: from_columnar(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [from_columnar(value) for value in data]
+    return data
+
+
+def _decode_table(columns, rows):
+    if not isinstance(columns, list) or not isinstance(rows, list):
+        raise ValueError('columns e rows devem ser listas')
+    if any(not isinstance(row, list) or len(row) != len(columns) for row in rows):
+        raise ValueError('Cada linha deve ter um valor por coluna')
+
+    decoders = []
+    for column in columns:
+        if isinstance(column, dict) and len(column) == 1:
+            (name, sub_columns), = column.items()
+            decoders.append((name, lambda value, sub_columns=sub_columns: (
+                None if value is None else _decode_table(sub_columns, value)
+            )))
+        elif isinstance(column, str):
+            decoders.append((column, from_columnar))
+        else:
+            raise ValueError('Cada coluna deve ser um nome ou {nome: colunas}')
+    _check_paths([name for name, _ in decoders])
+
+    records = []
+    for row in rows:
+        record = {}
+        for (name, decode), value in zip(decoders, row):
+            *parents, key = name.split('.')
+            node = record
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[key] = decode(value)
+        records.append(record)
+    return records
+
+
+def _check_paths(names):
+    """Rejeita colunas repetidas ou que seriam ao mesmo tempo valor e objeto (ex.: "a" e "a.b")."""
+    paths = set(names)
+    if len(paths) != len(names):
+        raise ValueError('Colunas repetidas')
+    for name in names:
+        parts = name.split('.')
+        for size in range(1, len(parts)):
+            prefix = '.'.join(parts[:size])
+            if prefix in paths:
+                raise ValueError(f'A coluna {name} conflita com a coluna {prefix}')
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Renderer JSON colunar, opcional por ?format=columnar ou pelo cabeçalho Accept."""
+    media_type = COLUMNAR_MEDIA_TYPE
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columnar(data), accepted_media_type, renderer_context)
+
+
+class ColumnarJSONParser(JSONParser):
+    """Parser do formato colunar (Content-Type: application/vnd.hubbi.columnar+json)."""
+    media_type = COLUMNAR_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = super().parse(stream, media_type, parser_context)
+        try:
+            return from_columnar(data)
+        except ValueError as e:
+            raise ParseError(f'Formato colunar inválido: {e}')
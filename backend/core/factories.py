@@ -0,0 +1,29 @@
+"""
+Factories (factory-boy) para geração de dados de teste e benchmark.
+"""
+import factory
+from django.contrib.auth.models import User
+from factory.django import DjangoModelFactory
+from products.models import Product
+
+
+class UserFactory(DjangoModelFactory):
+    """Factory de usuários (senha inutilizável, para não pagar o custo do hash)."""
+    class Meta:
+        model = User
+    
+    username = factory.Sequence(lambda n: f'user{n}')
+    email = factory.Faker('email')
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+    password = '!'
+
+
+class ProductFactory(DjangoModelFactory):
+    """Factory de produtos."""
+    class Meta:
+        model = Product
+    
+    name = factory.Faker('catch_phrase', locale='pt_BR')
+    price = factory.Faker('pydecimal', left_digits=4, right_digits=2, positive=True, min_value=1)
+    user = factory.SubFactory(UserFactory)
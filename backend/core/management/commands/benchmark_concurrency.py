@@ -0,0 +1,91 @@
+import json
+import sys
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.benchmark import DEFAULT_SCALE, run_load, run_server, seeded_test_database
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+    """
+    Compara a vazão de requisições concorrentes entre os deploys WSGI e ASGI.
+
+    Semeia um banco de teste descartável, sobe o gunicorn (core.wsgi, views DRF) e o
+    uvicorn (core.asgi, views async) apontando para ele e dispara requisições
+    concorrentes (keep-alive) contra as mesmas leituras em cada deploy.
+    """
+    help = 'Compara a vazão das leituras sob WSGI (gunicorn) e ASGI (uvicorn, views async)'
+
+    def add_arguments(self, parser):
+        for field, default in DEFAULT_SCALE.items():
+            parser.add_argument(f'--{field}', type=int, default=default, help=f'Escala: {field} (padrão {default})')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados gerados')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requisições simultâneas')
+        parser.add_argument('--requests', type=int, default=500, help='Requisições por endpoint')
+        parser.add_argument('--workers', type=int, default=1, help='Processos de cada servidor')
+        parser.add_argument('--threads', type=int, default=8, help='Threads por processo do gunicorn (WSGI)')
+        parser.add_argument('--port', type=int, default=8765, help='Porta local dos servidores')
+        parser.add_argument('--output', help='Arquivo JSON de saída do relatório')
+        parser.add_argument('--keepdb', action='store_true', help='Mantém o banco de teste após a execução')
+
+    def handle(self, *args, **options):
+        scale = {field: options[field] for field in DEFAULT_SCALE}
+        port = options['port']
+
+        with seeded_test_database(scale, options['seed'], options['keepdb']) as (test_name, users):
+            token = str(RefreshToken.for_user(users[0]).access_token)
+            sale_id = Sale.objects.values_list('pk', flat=True).first()
+            connection.close()
+
+            reads = {
+                'product-list': ('/api/products/', '/api/async/products/'),
+                'sale-list': ('/api/sales/', '/api/async/sales/'),
+                'sale-detail': (f'/api/sales/{sale_id}/', f'/api/async/sales/{sale_id}/'),
+                'sale-with-status': ('/api/sales/with_status/', '/api/async/sales/with_status/'),
+            }
+            deployments = [
+                ('wsgi', 0, [
+                    sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                    '--workers', str(options['workers']), '--threads', str(options['threads']),
+                ]),
+                ('asgi', 1, [
+                    sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                    '--workers', str(options['workers']), '--no-access-log',
+                ]),
+            ]
+
+            results = {}
+            for deployment, path_index, server_command in deployments:
+                try:
+                    with run_server(server_command, port, env={'DB_NAME': test_name}):
+                        results[deployment] = {
+                            name: run_load(port, paths[path_index], token, options['concurrency'], options['requests'])
+                            for name, paths in reads.items()
+                        }
+                except RuntimeError as e:
+                    raise CommandError(f'{deployment}: {e}')
+
+        for name in reads:
+            wsgi, asgi = results['wsgi'][name], results['asgi'][name]
+            self.stdout.write(
+                f"{name:18} WSGI {wsgi['requests_per_second']:>8.1f} req/s (p95 {wsgi['p95_ms']:>8.1f} ms)  "
+                f"ASGI {asgi['requests_per_second']:>8.1f} req/s (p95 {asgi['p95_ms']:>8.1f} ms)  "
+                f"x{asgi['requests_per_second'] / wsgi['requests_per_second']:.2f}"
+                + (f"  {wsgi['errors'] + asgi['errors']} erros" if wsgi['errors'] + asgi['errors'] else '')
+            )
+
+        if options['output']:
+            report = {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'scale': scale,
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+                'workers': options['workers'],
+                'threads': options['threads'],
+                'results': results,
+            }
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {options['output']}"))
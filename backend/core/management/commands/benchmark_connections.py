@@ -0,0 +1,83 @@
+import json
+import sys
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.benchmark import run_load, run_server, seeded_test_database
+from products.models import Product
+from sales.models import Sale
+
+
+# Modos de conexão comparados (variáveis de ambiente de core.settings)
+CONNECTION_MODES = {
+    'nova conexão': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistente': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'True', 'DB_POOL': 'False'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    """
+    Teste de carga da latência por modo de conexão com o banco.
+
+    Sobe o gunicorn sobre um banco de teste semeado uma vez para cada modo (nova conexão
+    por requisição, conexões persistentes e pool) e mede a latência de leituras pequenas,
+    em que o custo de abrir a conexão é mais visível.
+    """
+    help = 'Compara a latência das requisições com conexões novas, persistentes e em pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Requisições simultâneas')
+        parser.add_argument('--requests', type=int, default=1000, help='Requisições por endpoint')
+        parser.add_argument('--threads', type=int, default=8, help='Threads do gunicorn')
+        parser.add_argument('--port', type=int, default=8766, help='Porta local do servidor')
+        parser.add_argument('--output', help='Arquivo JSON de saída do relatório')
+
+    def handle(self, *args, **options):
+        port = options['port']
+        scale = {'users': 1, 'products': 50, 'sales': 50, 'items': 3, 'purchases': 1}
+
+        with seeded_test_database(scale) as (test_name, users):
+            token = str(RefreshToken.for_user(users[0]).access_token)
+            reads = {
+                'product-detail': f'/api/products/{Product.objects.values_list("pk", flat=True).first()}/',
+                'sale-detail': f'/api/sales/{Sale.objects.values_list("pk", flat=True).first()}/',
+            }
+            connection.close()
+
+            server_command = [
+                sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                '--workers', '1', '--threads', str(options['threads']),
+            ]
+            results = {}
+            for mode, env in CONNECTION_MODES.items():
+                try:
+                    with run_server(server_command, port, env={'DB_NAME': test_name, **env}):
+                        results[mode] = {
+                            name: run_load(port, path, token, options['concurrency'], options['requests'])
+                            for name, path in reads.items()
+                        }
+                except RuntimeError as e:
+                    raise CommandError(f'{mode}: {e}')
+
+        baseline = results['nova conexão']
+        for mode, mode_results in results.items():
+            for name, result in mode_results.items():
+                self.stdout.write(
+                    f"{mode:14} {name:16} mediana {result['median_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+                    f"{result['requests_per_second']:>8.1f} req/s  "
+                    f"({result['median_ms'] - baseline[name]['median_ms']:+.2f} ms)"
+                    + (f"  {result['errors']} erros" if result['errors'] else '')
+                )
+
+        if options['output']:
+            report = {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+                'results': results,
+            }
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {options['output']}"))
@@ -0,0 +1,78 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmark import DEFAULT_SCALE, compare_reports, run_benchmarks, seeded_test_database
+
+
+class Command(BaseCommand):
+    """
+    Executa o benchmark dos endpoints sobre dados semeados.
+    
+    Os dados são criados em um banco de teste descartável (o banco da aplicação
+    não é alterado). O relatório JSON pode ser comparado entre commits com --compare.
+    """
+    help = 'Mede tempo e número de queries de todos os endpoints GET sobre dados semeados'
+
+    def add_arguments(self, parser):
+        for field, default in DEFAULT_SCALE.items():
+            parser.add_argument(f'--{field}', type=int, default=default, help=f'Escala: {field} (padrão {default})')
+        parser.add_argument('--repeat', type=int, default=10, help='Execuções por endpoint')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados gerados')
+        parser.add_argument('--output', help='Arquivo JSON de saída do relatório')
+        parser.add_argument('--compare', help='Relatório JSON de referência para comparação')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Aumento relativo da mediana considerado regressão')
+        parser.add_argument('--min-delta', type=float, default=1.0, help='Aumento absoluto mínimo da mediana (ms) considerado regressão')
+        parser.add_argument('--warm-cache', action='store_true', help='Mede com o cache de respostas aquecido')
+        parser.add_argument('--keepdb', action='store_true', help='Mantém o banco de teste após a execução')
+
+    def handle(self, *args, **options):
+        scale = {field: options[field] for field in DEFAULT_SCALE}
+        
+        with seeded_test_database(scale, options['seed'], options['keepdb']) as (_, users):
+            results = run_benchmarks(users[0], repeat=options['repeat'], warm_cache=options['warm_cache'])
+        
+        report = {
+            'commit': self.get_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'scale': scale,
+            'repeat': options['repeat'],
+            'warm_cache': options['warm_cache'],
+            'endpoints': results,
+        }
+        
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:32} {result['status']}  mediana {result['median_ms']:>9.2f} ms  "
+                f"p95 {result['p95_ms']:>9.2f} ms  {result['queries']:>4} queries  {result['bytes']:>9} bytes"
+            )
+        
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {options['output']}"))
+        
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = []
+            for name, before_ms, after_ms, before_queries, after_queries, regression in compare_reports(
+                baseline, report, options['threshold'], options['min_delta']
+            ):
+                self.stdout.write(
+                    f"{name:32} {before_ms:>9.2f} -> {after_ms:>9.2f} ms  "
+                    f"{before_queries:>4} -> {after_queries:>4} queries{'  REGRESSÃO' if regression else ''}"
+                )
+                if regression:
+                    regressions.append(name)
+            if regressions:
+                raise CommandError(f"Regressão em {len(regressions)} endpoint(s): {', '.join(regressions)}")
+
+    def get_commit(self):
+        """Retorna o commit atual do repositório, se disponível."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,127 @@
+"""
+Instrumentação por requisição: queries SQL, serialização e view.
+
+Ativada por REQUEST_TIMING_ENABLED. Com o middleware desativado, o Django o remove
+da cadeia na inicialização (MiddlewareNotUsed), sem custo por requisição.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('core.timing')
+
+_current_timings = ContextVar('request_timings', default=None)
+
+
+def get_current_timings():
+    """Retorna as medições da requisição atual, ou None se ela não estiver sendo medida."""
+    return _current_timings.get()
+
+
+class RequestTimings:
+    """Acumula as medições de uma requisição (durações em segundos)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.view_time = None
+        self.serializer_time = None
+        self._view_started = None
+        self._serializer_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de execução de queries (connection.execute_wrapper)."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def start_view(self):
+        self._view_started = (time.perf_counter(), self.sql_time)
+
+    def start_serializer(self):
+        """Marca o início da serialização (apenas a primeira chamada conta)."""
+        if self._serializer_started is None:
+            self._serializer_started = (time.perf_counter(), self.sql_time)
+
+    def finish_view(self):
+        """Fecha as medições de view e serialização; o tempo de SQL é descontado da serialização."""
+        now = time.perf_counter()
+        if self._view_started is not None:
+            self.view_time = now - self._view_started[0]
+        if self._serializer_started is not None:
+            started, sql_before = self._serializer_started
+            self.serializer_time = max(0.0, (now - started) - (self.sql_time - sql_before))
+
+    def as_dict(self):
+        """Medições em milissegundos."""
+        data = {
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+        }
+        if self.view_time is not None:
+            data['view_ms'] = round(self.view_time * 1000, 2)
+        if self.serializer_time is not None:
+            data['serializer_ms'] = round(self.serializer_time * 1000, 2)
+        return data
+
+
+class RequestTimingMiddleware:
+    """
+    Mede queries SQL, serialização e view de cada requisição (amostrada).
+
+    Adiciona os cabeçalhos Server-Timing, X-SQL-Queries e X-SQL-Time e registra uma
+    linha JSON no logger 'core.timing'. View e serialização são medidas pelo TimingMixin
+    dos ViewSets. Em respostas em streaming, as queries executadas durante o envio do
+    corpo não são contabilizadas.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+
+        data = timings.as_dict()
+        metrics = [f'sql;dur={data["sql_ms"]};desc="{data["sql_count"]} queries"']
+        if 'serializer_ms' in data:
+            metrics.append(f'serializer;dur={data["serializer_ms"]}')
+        if 'view_ms' in data:
+            metrics.append(f'view;dur={data["view_ms"]}')
+        metrics.append(f'total;dur={data["total_ms"]}')
+        response['Server-Timing'] = ', '.join(metrics)
+        response['X-SQL-Queries'] = str(data['sql_count'])
+        response['X-SQL-Time'] = str(data['sql_ms'])
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **data,
+        }))
+        return response
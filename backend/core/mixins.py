@@ -1,15 +1,153 @@
+import hashlib
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
-from rest_framework import viewsets
+from django.db.models import F, Prefetch, Sum
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from core.cache import get_version, response_cache_key
+from core.middleware import get_current_timings
+from core.streaming import stream_csv, stream_ndjson
 
 
 class SubtotalMixin:
     """
     Mixin para calcular subtotal de itens de SaleItem e PurchaseItem.
+    
+    O preço unitário do produto é capturado na criação do item, de forma que
+    alterações de preço não mudam vendas e compras antigas.
     """
+    parent_field = None  # 'sale' ou 'purchase'
+    
     @property
     def subtotal(self):
         """Calcula o subtotal do item"""
-        return self.quantity * self.product.price
+        return self.quantity * self.unit_price
+    
+    def save(self, *args, **kwargs):
+        """Captura o preço do produto e atualiza os totais do pai"""
+        if self.unit_price is None:
+            self.unit_price = self.product.price
+        super().save(*args, **kwargs)
+        getattr(self, self.parent_field).update_totals()
+    
+    def delete(self, *args, **kwargs):
+        """Remove o item e atualiza os totais do pai"""
+        result = super().delete(*args, **kwargs)
+        getattr(self, self.parent_field).update_totals()
+        return result
+
+
+class TotalsMixin:
+    """
+    Mixin para manter os totais armazenados de Sale e Purchase (total_items, total_value).
+    """
+    def update_totals(self):
+        """Recalcula e salva os totais a partir dos itens"""
+        totals = self.items.aggregate(
+            total_items=Sum('quantity'),
+            total_value=Sum(F('quantity') * F('unit_price'))
+        )
+        self.total_items = totals['total_items'] or 0
+        self.total_value = totals['total_value'] or Decimal('0.00')
+        self.save(update_fields=['total_items', 'total_value'])
+
+
+def parse_fields(value):
+    """
+    Converte a lista de campos de ?fields= em árvore ('id,items.quantity' -> {'id': {}, 'items': {'quantity': {}}}).
+    
+    Um campo sem subcampos ({}) inclui o objeto aninhado completo. Retorna None sem campos.
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree or None
+
+
+class DynamicFieldsMixin:
+    """
+    Mixin para serializers com campos esparsos (?fields=) e expansão opcional (?expand=).
+    
+    O serializer raiz lê a seleção do contexto (SparseFieldsMixin); os aninhados recebem a
+    parte da árvore de campos correspondente. Campos de expandable_fields ficam fora da
+    resposta padrão e são incluídos (ou substituem o campo de mesmo nome) com ?expand=.
+    Sem os parâmetros, a resposta não muda.
+    """
+    expandable_fields = {}  # {'campo': função que retorna o field expandido}
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'fields' in self.context:
+            self.select_fields(self.context['fields'], self.context.get('expand', ()))
+    
+    def select_fields(self, fields, expand=()):
+        """Mantém apenas os campos pedidos (árvore de parse_fields, None para todos) e os expandidos."""
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            raise ValidationError({'expand': f"Campos não expansíveis: {', '.join(sorted(unknown))}"})
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name]()
+        if fields is None:
+            return
+        
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise ValidationError({'fields': f"Campos desconhecidos: {', '.join(sorted(unknown))}"})
+        for name in set(self.fields) - set(fields) - set(expand):
+            self.fields.pop(name)
+        
+        for name, subfields in fields.items():
+            if not subfields:
+                continue
+            nested = getattr(self.fields[name], 'child', self.fields[name])
+            if not isinstance(nested, DynamicFieldsMixin):
+                raise ValidationError({'fields': f"O campo {name} não tem subcampos"})
+            nested.select_fields(subfields)
+
+
+class SparseFieldsMixin:
+    """
+    Mixin para ViewSets com campos esparsos (?fields=) e expansão (?expand=) nas leituras.
+    
+    Passa a seleção aos serializers com DynamicFieldsMixin pelo contexto. Escritas
+    ignoram os parâmetros, para não descartar campos enviados.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    
+    def get_requested_fields(self):
+        """Árvore dos campos pedidos, ou None para a resposta completa."""
+        if self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+        return parse_fields(self.request.query_params.get(self.fields_query_param))
+    
+    def get_expanded_fields(self):
+        """Campos expandidos pedidos."""
+        if self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return []
+        value = self.request.query_params.get(self.expand_query_param) or ''
+        return [name.strip() for name in value.split(',') if name.strip()]
+    
+    def is_field_requested(self, name):
+        """Indica se o campo de primeiro nível entra na resposta."""
+        fields = self.get_requested_fields()
+        return fields is None or name in fields or name in self.get_expanded_fields()
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in ('GET', 'HEAD'):
+            context['fields'] = self.get_requested_fields()
+            context['expand'] = self.get_expanded_fields()
+        return context
 
 
 class CreateSerializerMixin:
@@ -28,15 +166,224 @@ class CreateSerializerMixin:
         return super().get_serializer_class()
 
 
-class PrefetchMixin:
+class TimingMixin:
+    """
+    Mixin para ViewSets medidos pelo RequestTimingMiddleware (tempo de view e de serialização).
+    
+    A serialização é contada a partir da primeira chamada a get_serializer, descontando o tempo de SQL.
+    Sem medição ativa, os métodos apenas delegam para a implementação padrão.
+    """
+    def initial(self, request, *args, **kwargs):
+        timings = get_current_timings()
+        if timings is not None:
+            timings.start_view()
+        super().initial(request, *args, **kwargs)
+    
+    def get_serializer(self, *args, **kwargs):
+        timings = get_current_timings()
+        if timings is not None:
+            timings.start_serializer()
+        return super().get_serializer(*args, **kwargs)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        timings = get_current_timings()
+        if timings is not None:
+            timings.finish_view()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class UserCacheMixin:
+    """
+    Mixin para ViewSets com respostas em cache por usuário, utilizado em ProductViewSet.
+    
+    A listagem (e as ações que chamarem cached_response) fica em cache sob uma chave com a
+    versão do namespace do usuário (core.cache), atualizada a cada alteração dos dados.
+    Apenas respostas 200 são armazenadas (os dados, não o corpo renderizado, de forma que
+    a negociação de formato continua valendo).
+    """
+    cache_namespace = None  # ex.: 'products'
+    
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Retorna a resposta em cache ou executa o handler e armazena o resultado"""
+        key = response_cache_key(self.cache_namespace, request.user.pk, request, self.action)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.USER_CACHE_TIMEOUT)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class ConditionalMixin:
+    """
+    Mixin para ViewSets com GET condicional (ETag / Last-Modified) em list e retrieve.
+    
+    ETag e Last-Modified vêm das versões dos namespaces dos dados da resposta (core.cache),
+    sem consultar o banco nem serializar: um If-None-Match (ou If-Modified-Since) válido
+    recebe 304 antes da execução da view. Outras ações podem usar conditional_response.
+    """
+    condition_namespaces = []  # ex.: ['sales', 'products']
+    action_condition_namespaces = {}  # Namespaces específicos por ação, como 'with_purchases'
+    expand_condition_namespaces = {}  # Namespaces dos campos expandidos (?expand=), como 'purchases'
+    condition_per_user = False  # Versões do usuário (dados filtrados por usuário) em vez das globais
+    
+    def get_condition_namespaces(self):
+        """Retorna os namespaces dos dados da ação atual, incluindo os dos campos expandidos"""
+        namespaces = list(self.action_condition_namespaces.get(self.action, self.condition_namespaces))
+        if self.expand_condition_namespaces:
+            for name in self.get_expanded_fields():
+                namespaces += [
+                    namespace for namespace in self.expand_condition_namespaces.get(name, [])
+                    if namespace not in namespaces
+                ]
+        return namespaces
+    
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Retorna 304 se a versão do cliente é a atual, senão executa o handler e adiciona os cabeçalhos"""
+        user_id = request.user.pk if self.condition_per_user else None
+        versions = [get_version(namespace, user_id) for namespace in self.get_condition_namespaces()]
+        
+        # A representação depende do usuário (dados filtrados), da URL e do formato negociado
+        digest = hashlib.md5(repr((
+            versions, request.user.pk, request.get_full_path(), request.META.get('HTTP_ACCEPT', '')
+        )).encode()).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = max(versions) // 10**9
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class PrefetchMixin(SparseFieldsMixin):
     """
     Mixin para ViewSets que precisam de prefetch otimizado, utilizado em SaleViewSet e PurchaseViewSet.
+    
+    O plano acompanha os campos pedidos (SparseFieldsMixin): relações de campos fora da
+    resposta não são carregadas, e os campos expandidos trazem as próprias relações.
     """
+    select_related_fields = []
     prefetch_fields = []
+    action_prefetch_fields = {}  # Prefetch específico por ação, como 'with_status'
+    expand_prefetch_fields = {}  # Prefetch dos campos expandidos, como 'purchases'
+    lookup_fields = {}  # Campos da resposta que usam cada relação, se diferentes do nome (ex.: {'user': ['username']})
+    
+    def get_prefetch_fields(self):
+        """Retorna os campos de prefetch da ação atual, ajustados aos campos pedidos"""
+        lookups = list(self.action_prefetch_fields.get(self.action, self.prefetch_fields))
+        for name in self.get_expanded_fields():
+            lookups += self.expand_prefetch_fields.get(name, [])
+        return [self.adapt_lookup(lookup) for lookup in lookups if self.is_lookup_needed(lookup)]
+    
+    def get_lookup_root(self, lookup):
+        path = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        return path.split('__')[0]
+    
+    def is_lookup_needed(self, lookup):
+        """Indica se algum campo pedido usa a relação"""
+        root = self.get_lookup_root(lookup)
+        return any(self.is_field_requested(name) for name in self.lookup_fields.get(root, [root]))
+    
+    def adapt_lookup(self, lookup):
+        """Remove do Prefetch os select_related de subcampos não pedidos (ex.: ?fields=items.quantity)"""
+        fields = self.get_requested_fields()
+        subfields = fields.get(self.get_lookup_root(lookup)) if fields else None
+        if not subfields or not isinstance(lookup, Prefetch) or lookup.queryset is None:
+            return lookup
+        select_related = lookup.queryset.query.select_related
+        if not isinstance(select_related, dict):
+            return lookup
+        
+        paths = []
+        def collect(tree, prefix):
+            for name, subtree in tree.items():
+                if subtree:
+                    collect(subtree, f'{prefix}{name}__')
+                else:
+                    paths.append(f'{prefix}{name}')
+        collect({name: subtree for name, subtree in select_related.items() if name in subfields}, '')
+        queryset = lookup.queryset.select_related(None)
+        if paths:
+            queryset = queryset.select_related(*paths)
+        return Prefetch(lookup.prefetch_through, queryset=queryset, to_attr=lookup.to_attr)
     
     def get_queryset(self):
-        """QuerySet otimizado com prefetch"""
+        """QuerySet otimizado com select_related e prefetch"""
         queryset = super().get_queryset()
-        if self.prefetch_fields:
-            queryset = queryset.prefetch_related(*self.prefetch_fields)
+        select_related_fields = [lookup for lookup in self.select_related_fields if self.is_lookup_needed(lookup)]
+        if select_related_fields:
+            queryset = queryset.select_related(*select_related_fields)
+        prefetch_fields = self.get_prefetch_fields()
+        if prefetch_fields:
+            queryset = queryset.prefetch_related(*prefetch_fields)
         return queryset
+    
+    def perform_update(self, serializer):
+        """Recarrega a instância com o prefetch, já que o cache de prefetch é descartado após a atualização"""
+        super().perform_update(serializer)
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+
+class ExportMixin:
+    """
+    Mixin para ViewSets com exportação em streaming dos itens, utilizado em SaleViewSet e PurchaseViewSet.
+    
+    Cada linha exportada é um item, com os dados da entidade pai repetidos (formato plano).
+    """
+    export_item_model = None
+    export_parent_field = None  # 'sale' ou 'purchase'
+    export_fields = []  # [(coluna, lookup no item), ...]
+    export_chunk_size = 2000
+    export_content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+    
+    def get_export_queryset(self):
+        """Itens das entidades do queryset da view, em ordem de chave primária"""
+        parents = self.filter_queryset(self.get_queryset()).values('pk')
+        return (
+            self.export_item_model.objects
+            .filter(**{f'{self.export_parent_field}__in': parents})
+            .annotate(subtotal_value=F('quantity') * F('unit_price'))
+            .order_by('pk')
+        )
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta os itens em CSV (padrão) ou NDJSON (?export_format=ndjson) em streaming.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in self.export_content_types:
+            return Response(
+                {'error': f"export_format deve ser um de: {', '.join(self.export_content_types)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        columns = [column for column, _ in self.export_fields]
+        lookups = [lookup for _, lookup in self.export_fields]
+        rows = self.get_export_queryset().values_list(*lookups).iterator(chunk_size=self.export_chunk_size)
+        
+        generate = stream_csv if export_format == 'csv' else stream_ndjson
+        response = StreamingHttpResponse(generate(columns, rows), content_type=self.export_content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{export_format}"'
+        return response
+
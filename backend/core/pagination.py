@@ -0,0 +1,126 @@
+"""
+Paginação compartilhada entre apps.
+"""
+import base64
+import json
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Paginação por página (padrão) com opção de paginação por cursor (keyset).
+    
+    A paginação por cursor é ativada por requisição com ?pagination=cursor (primeira
+    página) ou ?cursor=<token>. Ela usa o campo de ordenação do queryset
+    (ex.: -date, -created_at) com o id como desempate, filtrando a partir da última
+    posição em vez de usar OFFSET e sem COUNT(*), de forma que toda página tem o mesmo
+    custo. A resposta mantém o formato {count, next, previous, results}, com count nulo.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Cursor inválido'
+    
+    def use_cursor(self, request):
+        """Indica se a requisição optou pela paginação por cursor"""
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        """Pagina por página ou por cursor, conforme a requisição"""
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        self.field = ordering[0].lstrip('-')
+        descending = ordering[0].startswith('-')
+        
+        field = queryset.model._meta.get_field(self.field)
+        position, reverse = self.decode_cursor(request, field)
+        if reverse:
+            descending = not descending
+        
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}e': value}),
+                Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk})
+            )
+        
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        
+        if reverse:
+            self.next_position = self.get_position(results[-1]) if results else self.format_position(*position)
+            self.previous_position = self.get_position(results[0]) if has_more else None
+        else:
+            self.next_position = self.get_position(results[-1]) if has_more else None
+            self.previous_position = self.get_position(results[0]) if position is not None and results else None
+        return results
+    
+    def get_paginated_response(self, data):
+        """Mantém o formato da paginação por página"""
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': None,
+            'next': self.get_cursor_link(self.next_position, reverse=False),
+            'previous': self.get_cursor_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+    
+    def get_position(self, obj):
+        """Posição de um objeto: (valor do campo de ordenação, pk)"""
+        return self.format_position(getattr(obj, self.field), obj.pk)
+    
+    def format_position(self, value, pk):
+        """Posição serializável no cursor: (valor como texto, pk)"""
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return (str(value), pk)
+    
+    def get_cursor_link(self, position, reverse):
+        """Monta o link para a página a partir de uma posição"""
+        if position is None:
+            return None
+        payload = json.dumps({'p': position, 'r': reverse}).encode()
+        token = base64.urlsafe_b64encode(payload).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+    
+    def decode_cursor(self, request, field):
+        """Decodifica o cursor da requisição em (posição, reverse), com o valor convertido para o campo"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value, pk = payload['p']
+            value = field.to_python(value)
+            position, reverse = (value, int(pk)), bool(payload['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # Sem valor não há como filtrar a partir da posição
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
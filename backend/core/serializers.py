@@ -2,21 +2,23 @@
 Serializers e validadores compartilhados entre apps.
 """
 from rest_framework import serializers
-from products.models import Product
+from core.mixins import DynamicFieldsMixin
+from products.serializers import ProductSerializer
 
 
-class BaseItemSerializer(serializers.ModelSerializer):
-    """Serializer base para itens (SaleItem, PurchaseItem)."""
-    product = serializers.SerializerMethodField(read_only=True)
+class BaseItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer base para itens (SaleItem, PurchaseItem).
+    
+    O produto é serializado por um único ProductSerializer aninhado, reutilizado para
+    todos os itens. Espera os itens carregados com select_related('product__user').
+    """
+    product = ProductSerializer(read_only=True)
     product_id = serializers.IntegerField()
     subtotal = serializers.ReadOnlyField()
     
-    def get_product(self, obj):
-        """Retorna informações do produto."""
-        from products.serializers import ProductSerializer
-        return ProductSerializer(obj.product).data
-    
     class Meta:
         abstract = True
-        fields = ['id', 'product', 'product_id', 'quantity', 'subtotal']
+        fields = ['id', 'product', 'product_id', 'quantity', 'unit_price', 'subtotal']
+        read_only_fields = ['unit_price']
 
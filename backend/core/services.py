@@ -2,11 +2,22 @@
 Funções de serviço compartilhadas entre apps.
 Implementação simplificada sem over-engineering.
 """
-from typing import List, Dict
-from django.db import transaction
+import csv
+import time
+from decimal import Decimal
+from typing import Iterable, List, Dict
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from core.cache import invalidate
 from products.models import Product
+from sales.models import SaleDailyRollup, SaleFulfillment
+
+
+ROLLUP_FIELDS = ('sold_quantity', 'revenue', 'sales_count', 'purchased_quantity')
 
 
 def create_items_bulk(items_data: List[Dict], item_model, parent_field, parent_instance):
@@ -36,7 +47,8 @@ def create_items_bulk(items_data: List[Dict], item_model, parent_field, parent_i
         item_kwargs = {
             parent_field: parent_instance,
             'product': product,
-            'quantity': item_data['quantity']
+            'quantity': item_data['quantity'],
+            'unit_price': product.price
         }
         items_to_create.append(item_model(**item_kwargs))
     
@@ -44,6 +56,151 @@ def create_items_bulk(items_data: List[Dict], item_model, parent_field, parent_i
     return item_model.objects.bulk_create(items_to_create)
 
 
+def update_sale_fulfillment(parent_field, items, sign=1):
+    """
+    Atualiza as quantidades vendidas/compradas em SaleFulfillment.
+    
+    Itens de venda criam uma linha por produto; itens de compra somam (ou, com sign=-1,
+    subtraem) a quantidade comprada dos produtos da venda atendida, em uma query por venda.
+    
+    Args:
+        parent_field: Nome do campo pai ('sale' ou 'purchase')
+        items: Itens criados ou removidos (de uma ou mais entidades)
+        sign: 1 para itens criados, -1 para itens removidos
+    """
+    if not items:
+        return
+    
+    if parent_field == 'sale':
+        if sign > 0:
+            SaleFulfillment.objects.bulk_create([
+                SaleFulfillment(sale_id=item.sale_id, product_id=item.product_id, ordered_quantity=item.quantity)
+                for item in items
+            ])
+        return
+    
+    # Agrupar quantidades por venda atendida
+    quantities_by_sale = {}
+    for item in items:
+        sale_quantities = quantities_by_sale.setdefault(item.purchase.sale_id, {})
+        sale_quantities[item.product_id] = sale_quantities.get(item.product_id, 0) + sign * item.quantity
+    
+    for sale_id, quantities in quantities_by_sale.items():
+        SaleFulfillment.objects.filter(
+            sale_id=sale_id,
+            product_id__in=quantities
+        ).update(
+            purchased_quantity=F('purchased_quantity') + Case(
+                *[When(product_id=product_id, then=Value(qty)) for product_id, qty in quantities.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        )
+
+
+def update_sale_rollups(parent_field, items, sign=1):
+    """
+    Atualiza os totais diários (SaleDailyRollup) de usuário, produto e dia das vendas.
+    
+    Itens de venda somam (ou, com sign=-1, subtraem) quantidade, receita e vendas; itens de
+    compra somam a quantidade comprada, limitada à vendida, no dia da venda atendida. Lê o
+    atendimento atual, travando as linhas até o fim da transação para que compras concorrentes
+    da mesma venda esperem, portanto deve ser chamada antes de update_sale_fulfillment e dentro
+    de transaction.atomic.
+    
+    Args:
+        parent_field: Nome do campo pai ('sale' ou 'purchase')
+        items: Itens criados ou removidos (de uma ou mais entidades)
+        sign: 1 para itens criados, -1 para itens removidos
+    """
+    if not items:
+        return
+    
+    deltas = {}
+    
+    def add(user_id, product_id, date, **values):
+        row = deltas.setdefault((user_id, product_id, timezone.localdate(date)), dict.fromkeys(ROLLUP_FIELDS, 0))
+        for field, value in values.items():
+            row[field] += value
+    
+    if parent_field == 'sale':
+        for item in items:
+            add(
+                item.sale.user_id, item.product_id, item.sale.date,
+                sold_quantity=sign * item.quantity, revenue=sign * item.subtotal, sales_count=sign
+            )
+        if sign < 0:
+            # As compras da venda são removidas junto com ela
+            fulfillments = SaleFulfillment.objects.filter(
+                sale_id__in={item.sale_id for item in items}
+            ).select_for_update(of=('self',)).order_by('pk').values_list(
+                'product_id', 'ordered_quantity', 'purchased_quantity', 'sale__user_id', 'sale__date'
+            )
+            for product_id, ordered, purchased, user_id, date in fulfillments:
+                add(user_id, product_id, date, purchased_quantity=-min(purchased, ordered))
+    else:
+        quantities = {}
+        for item in items:
+            key = (item.purchase.sale_id, item.product_id)
+            quantities[key] = quantities.get(key, 0) + sign * item.quantity
+        
+        fulfillments = SaleFulfillment.objects.filter(
+            sale_id__in={sale_id for sale_id, _ in quantities},
+            product_id__in={product_id for _, product_id in quantities}
+        ).select_for_update(of=('self',)).order_by('pk').values_list(
+            'sale_id', 'product_id', 'ordered_quantity', 'purchased_quantity', 'sale__user_id', 'sale__date'
+        )
+        for sale_id, product_id, ordered, purchased, user_id, date in fulfillments:
+            quantity = quantities.get((sale_id, product_id))
+            if quantity:
+                covered = min(max(purchased + quantity, 0), ordered) - min(purchased, ordered)
+                add(user_id, product_id, date, purchased_quantity=covered)
+    
+    increment_sale_rollups(deltas)
+
+
+def increment_sale_rollups(deltas, batch_size=5000):
+    """
+    Soma valores aos totais diários, criando as linhas que faltam.
+    
+    Cada lote usa duas queries: um INSERT das linhas que faltam (ignorando as existentes)
+    e um UPDATE ... FROM com os valores do lote, de custo linear no número de linhas.
+    
+    Args:
+        deltas: {(user_id, product_id, dia): {'campo': valor, ...}}
+        batch_size: Quantidade de linhas por lote
+    """
+    deltas = [(key, values) for key, values in deltas.items() if any(values.values())]
+    if not deltas:
+        return
+    
+    table = connection.ops.quote_name(SaleDailyRollup._meta.db_table)
+    columns = ['user_id', 'product_id', 'day', *ROLLUP_FIELDS]
+    assignments = ', '.join(f'{field} = {field} + d_{field}' for field in ROLLUP_FIELDS)
+    row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    
+    for start in range(0, len(deltas), batch_size):
+        batch = deltas[start:start + batch_size]
+        
+        # Subtrações (remoções) sempre encontram a linha criada pela soma correspondente
+        missing = [key for key, values in batch if any(value > 0 for value in values.values())]
+        if missing:
+            SaleDailyRollup.objects.bulk_create(
+                [SaleDailyRollup(user_id=user_id, product_id=product_id, day=day) for user_id, product_id, day in missing],
+                ignore_conflicts=True
+            )
+        
+        params = [value for key, values in batch for value in (*key, *(values[field] for field in ROLLUP_FIELDS))]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH d({", ".join(f"d_{column}" for column in columns)}) AS '
+                f'(VALUES {", ".join([row_placeholder] * len(batch))}) '
+                f'UPDATE {table} SET {assignments} FROM d '
+                f'WHERE user_id = d_user_id AND product_id = d_product_id AND day = d_day',
+                params
+            )
+
+
 def create_entity_with_items(entity_model, item_model, parent_field, user, items_data, **kwargs):
     """
     Cria entidades com os itens.
@@ -64,7 +221,240 @@ def create_entity_with_items(entity_model, item_model, parent_field, user, items
         entity = entity_model.objects.create(user=user, **kwargs)
         
         # Criar itens
-        create_items_bulk(items_data, item_model, parent_field, entity)
+        items = create_items_bulk(items_data, item_model, parent_field, entity)
+        
+        # Armazenar totais calculados a partir dos itens criados
+        entity.total_items = sum(item.quantity for item in items)
+        entity.total_value = sum((item.subtotal for item in items), Decimal('0.00'))
+        entity.save(update_fields=['total_items', 'total_value'])
+        
+        # Atualizar totais diários e atendimento da venda
+        update_sale_rollups(parent_field, items)
+        update_sale_fulfillment(parent_field, items)
         
         return entity
 
+
+def create_entities_bulk(entity_model, item_model, parent_field, user, entities_data, entity_fields=(), batch_size=1000):
+    """
+    Cria muitas entidades com itens de uma só vez.
+    
+    Os produtos de todas as entidades são buscados em uma única query; entidades
+    inválidas são ignoradas e reportadas, as válidas são criadas com bulk_create
+    (cabeçalhos, depois itens) em uma única transação.
+    
+    Args:
+        entity_model: Model da entidade (Sale ou Purchase)
+        item_model: Model do item (SaleItem ou PurchaseItem)
+        parent_field: Nome do campo pai ('sale' ou 'purchase')
+        user: Usuário criador
+        entities_data: Lista de entidades [{'items': [{'product_id': 1, 'quantity': 2}, ...]}, ...]
+        entity_fields: Campos adicionais copiados de cada entidade (ex.: ('sale_id',) para compras)
+        batch_size: Quantidade de registros por INSERT
+    
+    Returns:
+        dict: {'created': [ids das entidades criadas], 'errors': [{'index': i, 'errors': [...]}]}
+    """
+    # Buscar produtos de todas as entidades de uma vez
+    product_ids = {
+        item.get('product_id')
+        for entity_data in entities_data
+        for item in entity_data.get('items') or []
+        if isinstance(item, dict)
+    }
+    product_ids = {pid for pid in product_ids if isinstance(pid, int)}
+    products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
+    
+    # Validar entidades e montar objetos
+    errors = []
+    entities = []
+    entity_items = []
+    for index, entity_data in enumerate(entities_data):
+        items_errors, items = _build_items(entity_data.get('items'), item_model, products)
+        if items_errors:
+            errors.append({'index': index, 'errors': items_errors})
+            continue
+        entities.append(entity_model(
+            user=user,
+            total_items=sum(item.quantity for item in items),
+            total_value=sum((item.subtotal for item in items), Decimal('0.00')),
+            **{field: entity_data[field] for field in entity_fields if field in entity_data}
+        ))
+        entity_items.append(items)
+    
+    with transaction.atomic():
+        entity_model.objects.bulk_create(entities, batch_size=batch_size)
+        
+        items_to_create = []
+        for entity, items in zip(entities, entity_items):
+            for item in items:
+                setattr(item, parent_field, entity)
+                items_to_create.append(item)
+        item_model.objects.bulk_create(items_to_create, batch_size=batch_size)
+        
+        update_sale_rollups(parent_field, items_to_create)
+        update_sale_fulfillment(parent_field, items_to_create)
+        
+        # bulk_create não dispara sinais
+        if entities:
+            invalidate(entity_model._meta.app_label, user.pk)
+    
+    return {
+        'created': [entity.pk for entity in entities],
+        'errors': errors,
+    }
+
+
+def _build_items(items_data, item_model, products):
+    """
+    Valida os dados dos itens de uma entidade e monta os objetos (sem salvar).
+    
+    Returns:
+        tuple: (lista de erros, lista de itens)
+    """
+    if not isinstance(items_data, list):
+        return ['items deve ser uma lista'], []
+    
+    errors = []
+    items = []
+    seen = set()
+    for item_data in items_data:
+        if not isinstance(item_data, dict):
+            errors.append('Cada item deve ser um objeto com product_id e quantity')
+            continue
+        product_id = item_data.get('product_id')
+        quantity = item_data.get('quantity')
+        product = products.get(product_id) if isinstance(product_id, int) else None
+        if not product:
+            errors.append(f"Produto com ID {product_id} não encontrado")
+            continue
+        if product_id in seen:
+            errors.append(f"Produto com ID {product_id} repetido")
+            continue
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            errors.append(f"Quantidade inválida para o produto {product_id}")
+            continue
+        seen.add(product_id)
+        items.append(item_model(product=product, quantity=quantity, unit_price=product.price))
+    return errors, items
+
+
+def delete_entity_with_items(entity, parent_field):
+    """
+    Remove entidades com os itens, mantendo o atendimento e os totais diários das vendas consistentes.
+    
+    Args:
+        entity: Instância da entidade (Sale ou Purchase)
+        parent_field: Nome do campo pai ('sale' ou 'purchase')
+    """
+    with transaction.atomic():
+        items = list(entity.items.all())
+        update_sale_rollups(parent_field, items, sign=-1)
+        update_sale_fulfillment(parent_field, items, sign=-1)
+        entity.delete()
+
+
+def refresh_totals(entity_model, item_model, parent_field, entity_ids):
+    """
+    Recalcula os totais armazenados (total_items, total_value) das entidades em uma query.
+    
+    Usado quando itens são removidos sem passar por update_totals (ex.: remoção em cascata
+    de um produto).
+    
+    Args:
+        entity_model: Model da entidade (Sale ou Purchase)
+        item_model: Model do item (SaleItem ou PurchaseItem)
+        parent_field: Nome do campo pai ('sale' ou 'purchase')
+        entity_ids: IDs das entidades recalculadas
+    """
+    items = item_model.objects.filter(**{parent_field: OuterRef('pk')}).order_by().values(parent_field)
+    entity_model.objects.filter(pk__in=entity_ids).update(
+        total_items=Coalesce(Subquery(items.annotate(total=Sum('quantity')).values('total')), 0),
+        total_value=Coalesce(
+            Subquery(items.annotate(total=Sum(F('quantity') * F('unit_price'))).values('total')),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        ),
+    )
+
+
+class ImportAborted(ValidationError):
+    """Erro que interrompe a importação, com a quantidade de produtos já inseridos (created)."""
+    def __init__(self, message, created):
+        super().__init__(message)
+        self.created = created
+
+
+def import_products_csv(lines: Iterable[str], user, chunk_size=5000, max_errors=100):
+    """
+    Importa produtos de um CSV (colunas name e price) em streaming.
+    
+    As linhas são validadas uma a uma e inseridas com bulk_create a cada chunk_size
+    produtos válidos, de forma que o uso de memória não depende do tamanho do arquivo.
+    Os chunks já inseridos são mantidos se o arquivo se revelar inválido no meio
+    (codificação ou CSV malformado): o ImportAborted informa quantos foram criados.
+    
+    Args:
+        lines: Iterável de linhas do CSV (arquivo aberto em modo texto)
+        user: Usuário dono dos produtos
+        chunk_size: Quantidade de produtos por INSERT
+        max_errors: Quantidade máxima de erros detalhados no relatório
+    
+    Returns:
+        dict: Relatório com created, error_count, errors, elapsed_seconds e rows_per_second
+    
+    Raises:
+        ValidationError: CSV sem as colunas obrigatórias
+        ImportAborted: Arquivo fora de UTF-8 ou CSV malformado
+    """
+    started = time.monotonic()
+    name_field = Product._meta.get_field('name')
+    price_field = Product._meta.get_field('price')
+    
+    created = 0
+    error_count = 0
+    errors = []
+    batch = []
+    reader = csv.DictReader(lines)
+    try:
+        if not reader.fieldnames or not {'name', 'price'} <= {f.strip() for f in reader.fieldnames}:
+            raise ValidationError("O CSV deve ter as colunas name e price")
+        
+        for row in reader:
+            row = {(key or '').strip(): value for key, value in row.items()}
+            try:
+                name = name_field.clean((row.get('name') or '').strip(), None)
+                price = price_field.clean((row.get('price') or '').strip(), None)
+            except ValidationError as e:
+                error_count += 1
+                if len(errors) < max_errors:
+                    errors.append({'line': reader.line_num, 'errors': e.messages})
+                continue
+            
+            batch.append(Product(name=name, price=price, user=user))
+            if len(batch) >= chunk_size:
+                Product.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        
+        if batch:
+            Product.objects.bulk_create(batch)
+            created += len(batch)
+    except UnicodeDecodeError:
+        raise ImportAborted('O arquivo deve estar em UTF-8', created)
+    except csv.Error as e:
+        raise ImportAborted(f'CSV inválido na linha {reader.line_num}: {e}', created)
+    finally:
+        # bulk_create não dispara sinais: invalida as versões de produtos explicitamente,
+        # inclusive quando a importação é interrompida após inserir algum chunk
+        if created:
+            invalidate('products', user.pk)
+    
+    elapsed = time.monotonic() - started
+    return {
+        'created': created,
+        'error_count': error_count,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round((created + error_count) / elapsed) if elapsed > 0 else None,
+    }
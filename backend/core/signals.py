@@ -0,0 +1,13 @@
+"""
+Sinais de invalidação do cache de usuários da autenticação (core.authentication).
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.authentication import user_cache
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Remove o usuário do cache de autenticação."""
+    user_cache.invalidate(instance.pk)
@@ -0,0 +1,94 @@
+"""
+Utilitários para respostas em streaming.
+Permitem gerar respostas grandes sem carregar todos os registros em memória.
+"""
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Percorre o queryset com iterator(), agrupando os objetos em listas.
+    
+    Args:
+        queryset: QuerySet a ser percorrido (prefetch_related é aplicado por chunk)
+        chunk_size: Quantidade de objetos por chunk
+    
+    Yields:
+        list: Lista com até chunk_size objetos
+    """
+    iterator = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_json_array(chunks):
+    """
+    Gera um array JSON incrementalmente.
+    
+    Args:
+        chunks: Iterável de listas de objetos já serializados
+    
+    Yields:
+        str: Partes do array JSON
+    """
+    yield '['
+    separator = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        yield separator + ','.join(json.dumps(obj, cls=JSONEncoder) for obj in chunk)
+        separator = ','
+    yield ']'
+
+
+class _Echo:
+    """Objeto com interface de arquivo que apenas devolve o que é escrito (para csv.writer)."""
+    def write(self, value):
+        return value
+
+
+def _format_csv_value(value):
+    """Formata datas em ISO 8601 nas linhas CSV."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(columns, rows):
+    """
+    Gera um CSV linha a linha.
+    
+    Args:
+        columns: Nomes das colunas (cabeçalho)
+        rows: Iterável de tuplas com os valores de cada linha
+    
+    Yields:
+        str: Linhas do CSV
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_format_csv_value(value) for value in row])
+
+
+def stream_ndjson(columns, rows):
+    """
+    Gera NDJSON (um objeto JSON por linha).
+    
+    Args:
+        columns: Nomes dos campos de cada objeto
+        rows: Iterável de tuplas com os valores de cada linha
+    
+    Yields:
+        str: Linhas NDJSON
+    """
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=JSONEncoder) + '\n'
+
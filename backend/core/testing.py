@@ -0,0 +1,60 @@
+"""
+Utilitários de teste compartilhados entre apps.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+STANDARD_ACTIONS = ['list', 'create', 'retrieve', 'update', 'partial_update', 'destroy']
+
+
+class QueryBudgetTestMixin:
+    """
+    Mixin para APITestCase que verifica o orçamento de queries (query_budgets) de um ViewSet.
+
+    A classe de teste define:
+        viewset: ViewSet com query_budgets = {'ação': máximo de queries}
+        budget_requests: {'ação': função(self) que retorna (método, url, kwargs do client)}
+        grow(): aumenta o volume de dados do usuário autenticado
+
+    Cada ação é executada em duas escalas (antes e depois de grow). O teste falha se uma
+    ação excede o orçamento, se o número de queries cresce com o volume de dados ou se
+    alguma ação do ViewSet não tem orçamento. A autenticação não entra na contagem
+    (use force_authenticate).
+    """
+    viewset = None
+    budget_requests = {}
+
+    def grow(self):
+        raise NotImplementedError
+
+    def get_viewset_actions(self):
+        """Ações roteadas do ViewSet (padrão e customizadas)."""
+        actions = [name for name in STANDARD_ACTIONS if hasattr(self.viewset, name)]
+        return actions + [extra_action.__name__ for extra_action in self.viewset.get_extra_actions()]
+
+    def count_queries(self, action):
+        """Executa a requisição da ação e retorna o número de queries."""
+        method, url, kwargs = self.budget_requests[action](self)
+        cache.clear()  # o orçamento vale para respostas fora do cache
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, f'{action}: {response.status_code}')
+        return len(queries)
+
+    def assert_query_budgets(self):
+        budgets = self.viewset.query_budgets
+        self.assertEqual(sorted(budgets), sorted(self.get_viewset_actions()), 'Ações sem orçamento de queries')
+        self.assertEqual(sorted(self.budget_requests), sorted(budgets), 'Orçamentos sem requisição de teste')
+
+        small = {action: self.count_queries(action) for action in budgets}
+        self.grow()
+        large = {action: self.count_queries(action) for action in budgets}
+
+        for action, budget in budgets.items():
+            with self.subTest(action=action):
+                self.assertLessEqual(large[action], budget, f'{action} excede o orçamento de queries')
+                self.assertEqual(small[action], large[action], f'{action} cresce com o volume de dados')
@@ -1,9 +1,27 @@
-from django.test import TestCase
+import json
+import subprocess
+import sys
+from decimal import Decimal
+from unittest import skipUnless
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from core.authentication import user_cache
+from core.cache import get_version
+from core.checks import check_version_cache
+from core.benchmark import compare_reports, run_benchmarks, seed
+from core.columnar import from_columnar, to_columnar
+from core.services import create_entities_bulk, create_entity_with_items
+from products.models import Product
+from sales.models import Sale, SaleItem
+from purchases.models import Purchase, PurchaseItem
 
 
 class AuthenticationTest(APITestCase):
@@ -82,3 +100,341 @@ class AuthenticationTest(APITestCase):
         response = self.client.post(url, data)
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    """Testes para a autenticação JWT com cache de usuários."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        user_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+    
+    def test_cached_user_saves_query(self):
+        """Testa que requisições seguintes não consultam o usuário."""
+        url = reverse('sale-list')
+        
+        first = self.count_queries(url)
+        second = self.count_queries(url)
+        
+        self.assertEqual(second, first - 1)
+    
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_expires(self):
+        """Testa expiração do cache pelo TTL."""
+        url = reverse('sale-list')
+        
+        self.assertEqual(self.count_queries(url), self.count_queries(url))
+    
+    def test_perform_create_with_cached_user(self):
+        """Testa criação com o usuário em cache (request.user é um User)."""
+        self.client.get(reverse('sale-list'))
+        
+        response = self.client.post(reverse('product-list'), {'name': 'Produto', 'price': '10.00'})
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.objects.get().user, self.user)
+        self.assertEqual(self.client.get(reverse('product-list')).data['count'], 1)
+    
+    def test_invalidation_on_user_change(self):
+        """Testa que usuário desativado perde o acesso mesmo já estando em cache."""
+        self.client.get(reverse('sale-list'))
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.get(reverse('sale-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RequestTimingTest(APITestCase):
+    """Testes para o RequestTimingMiddleware."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        product = Product.objects.create(name='Produto', price=Decimal('10.00'), user=self.user)
+        create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': product.id, 'quantity': 1}])
+        self.client.force_authenticate(user=self.user)
+    
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_timing_headers_and_log(self):
+        """Testa cabeçalhos Server-Timing e linha de log estruturada"""
+        with self.assertLogs('core.timing', level='INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('sale-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-SQL-Queries'], str(len(queries)))
+        for metric in ('sql;dur=', 'serializer;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metric, response['Server-Timing'])
+        
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], reverse('sale-list'))
+        self.assertEqual(entry['status'], 200)
+        self.assertEqual(entry['sql_count'], len(queries))
+        self.assertLessEqual(entry['serializer_ms'], entry['view_ms'])
+    
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SAMPLE_RATE=0.0)
+    def test_not_sampled(self):
+        """Testa requisição fora da amostragem"""
+        response = self.client.get(reverse('sale-list'))
+        
+        self.assertNotIn('Server-Timing', response)
+    
+    def test_disabled(self):
+        """Testa middleware desativado (padrão)"""
+        response = self.client.get(reverse('sale-list'))
+        
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('X-SQL-Queries', response)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Planos de execução verificados apenas no PostgreSQL')
+class QueryPlanTest(APITestCase):
+    """
+    Testes de regressão dos planos de execução dos endpoints.
+    
+    Executa EXPLAIN ANALYZE em cada query dos endpoints, sobre dados semeados, com
+    seq scan desabilitado no planejador: uma Seq Scan restante indica que não existe
+    índice para o caminho de acesso. Também falha com sorts externos (em disco) e
+    com Sort (inclusive Incremental Sort) em queries paginadas (ORDER BY com LIMIT),
+    cuja ordenação deve vir de um índice.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Semeia usuários, produtos, vendas e compras."""
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        
+        for owner in (cls.user, other):
+            Product.objects.bulk_create([
+                Product(name=f'Produto {i}', price=Decimal('10.00') + i, user=owner)
+                for i in range(100)
+            ])
+        product_ids = list(Product.objects.filter(user=cls.user).values_list('id', flat=True))
+        
+        result = create_entities_bulk(
+            entity_model=Sale,
+            item_model=SaleItem,
+            parent_field='sale',
+            user=cls.user,
+            entities_data=[
+                {'items': [{'product_id': product_ids[(i + j) % 100], 'quantity': j + 1} for j in range(3)]}
+                for i in range(300)
+            ]
+        )
+        for sale_id in result['created'][:100]:
+            sale = Sale.objects.get(pk=sale_id)
+            create_entity_with_items(
+                entity_model=Purchase,
+                item_model=PurchaseItem,
+                parent_field='purchase',
+                user=cls.user,
+                items_data=[{'product_id': item.product_id, 'quantity': 1} for item in sale.items.all()],
+                sale_id=sale_id
+            )
+        
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        
+        cls.sale = Sale.objects.filter(purchases__isnull=False).first()
+        cls.purchase = Purchase.objects.first()
+        cls.product = Product.objects.filter(user=cls.user).first()
+        cls.today = timezone.localdate().isoformat()
+    
+    def setUp(self):
+        """Autentica o usuário semeado."""
+        self.client.force_authenticate(user=self.user)
+    
+    def explain(self, sql):
+        """Retorna o plano (EXPLAIN ANALYZE em JSON) de uma query, sem seq scan."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+    
+    def plan_nodes(self, node):
+        """Percorre todos os nós de um plano."""
+        yield node
+        for child in node.get('Plans', []):
+            yield from self.plan_nodes(child)
+    
+    def assert_plans(self, url, params=None, index_order=True):
+        """
+        Executa o endpoint e verifica o plano de cada query SELECT.
+        
+        Com index_order=False, aceita Sort em queries paginadas: usado em filtros seletivos,
+        cujas poucas linhas o banco ordena em memória.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            nodes = list(self.plan_nodes(self.explain(sql)))
+            for node in nodes:
+                self.assertNotEqual(
+                    node['Node Type'], 'Seq Scan',
+                    f"Seq Scan em {node.get('Relation Name')}: {sql}"
+                )
+                self.assertNotIn(
+                    'external', node.get('Sort Method', ''),
+                    f'Sort externo: {sql}'
+                )
+            if index_order and 'ORDER BY' in sql and 'LIMIT' in sql:
+                sorts = [n['Node Type'] for n in nodes if n['Node Type'].endswith('Sort')]
+                self.assertFalse(sorts, f'{sorts} em query paginada: {sql}')
+    
+    def test_product_plans(self):
+        """Testa planos dos endpoints de produtos."""
+        self.assert_plans(reverse('product-list'))
+        self.assert_plans(reverse('product-list'), {'page': 4})
+        self.assert_plans(reverse('product-list'), {'pagination': 'cursor'})
+        self.assert_plans(reverse('product-my-products'))
+        self.assert_plans(reverse('product-detail', kwargs={'pk': self.product.pk}))
+        self.assert_plans(reverse('product-list'), {'min_price': '20.00', 'max_price': '60.00'})
+        self.assert_plans(reverse('product-list'), {'created_after': self.today, 'pagination': 'cursor'})
+        # Prefixo com mais resultados que o limite: a lista sai do índice de prefixo, sem Sort
+        self.assert_plans(reverse('product-autocomplete'), {'search': 'produto'})
+    
+    def test_sale_plans(self):
+        """Testa planos dos endpoints de vendas."""
+        self.assert_plans(reverse('sale-list'))
+        self.assert_plans(reverse('sale-list'), {'page': 10})
+        self.assert_plans(reverse('sale-list'), {'pagination': 'cursor'})
+        self.assert_plans(reverse('sale-detail', kwargs={'pk': self.sale.pk}))
+        self.assert_plans(reverse('sale-with-purchases', kwargs={'pk': self.sale.pk}))
+        self.assert_plans(reverse('sale-with-status'))
+        self.assert_plans(reverse('sale-list'), {'date_after': self.today, 'date_before': self.today})
+        self.assert_plans(reverse('sale-list'), {'product': self.product.pk}, index_order=False)
+    
+    def test_purchase_plans(self):
+        """Testa planos dos endpoints de compras."""
+        self.assert_plans(reverse('purchase-list'))
+        self.assert_plans(reverse('purchase-list'), {'pagination': 'cursor'})
+        self.assert_plans(reverse('purchase-detail', kwargs={'pk': self.purchase.pk}))
+        self.assert_plans(reverse('purchase-list'), {'sale': self.sale.pk}, index_order=False)
+        self.assert_plans(reverse('purchase-list'), {'date_after': self.today, 'pagination': 'cursor'})
+        self.assert_plans(reverse('purchase-list'), {'product': self.product.pk}, index_order=False)
+
+
+class BenchmarkTest(TestCase):
+    """Testes do benchmark dos endpoints em escala reduzida."""
+    
+    def test_seed_and_run(self):
+        """Testa semeadura dos dados e medição de todos os endpoints GET"""
+        users = seed({'users': 2, 'products': 10, 'sales': 5, 'items': 3, 'purchases': 1})
+        
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Sale.objects.count(), 10)
+        self.assertEqual(Purchase.objects.count(), 10)
+        self.assertEqual(SaleItem.objects.count(), 30)
+        
+        results = run_benchmarks(users[0], repeat=2)
+        
+        for name in ('product-list', 'product-my-products', 'product-autocomplete', 'sale-detail', 'sale-with-status', 'sale-with-purchases', 'purchase-list'):
+            self.assertIn(name, results)
+            self.assertEqual(results[name]['status'], 200)
+            self.assertGreater(results[name]['queries'], 0)
+        self.assertIn('?search=', results['product-autocomplete']['url'])
+    
+    def test_compare_reports(self):
+        """Testa detecção de regressão por tempo e por número de queries"""
+        baseline = {'endpoints': {
+            'a': {'median_ms': 10.0, 'queries': 3},
+            'b': {'median_ms': 10.0, 'queries': 3},
+            'c': {'median_ms': 10.0, 'queries': 3},
+        }}
+        current = {'endpoints': {
+            'a': {'median_ms': 10.5, 'queries': 3},
+            'b': {'median_ms': 15.0, 'queries': 3},
+            'c': {'median_ms': 9.0, 'queries': 4},
+        }}
+        
+        regressions = {row[0]: row[-1] for row in compare_reports(baseline, current, threshold=0.2)}
+        
+        self.assertEqual(regressions, {'a': False, 'b': True, 'c': True})
+
+
+class ColumnarFormatTest(TestCase):
+    """Testes da conversão para o formato colunar e de volta."""
+    
+    def test_round_trip(self):
+        """Testa listas aninhadas, objetos aninhados e valores nulos."""
+        data = {'count': 2, 'next': None, 'results': [
+            {'id': 1, 'product': {'id': 5, 'name': 'A'}, 'items': [{'quantity': 1}], 'tags': ['x']},
+            {'id': 2, 'product': {'id': 6, 'name': 'B'}, 'items': [], 'tags': []},
+        ]}
+        
+        columnar = to_columnar(data)
+        
+        self.assertEqual(columnar['results']['columns'], ['id', 'product.id', 'product.name', {'items': ['quantity']}, 'tags'])
+        self.assertEqual(columnar['results']['rows'], [[1, 5, 'A', [[1]], ['x']], [2, 6, 'B', [], []]])
+        self.assertEqual(from_columnar(columnar), data)
+    
+    def test_plain_values_unchanged(self):
+        """Testa que listas sem objetos e erros de validação não mudam."""
+        for data in [[], [1, 2], {'detail': 'Erro'}, {'items': ['Campo obrigatório.']}]:
+            with self.subTest(data=data):
+                self.assertEqual(to_columnar(data), data)
+    
+    def test_invalid_table(self):
+        """Testa tabelas com linhas de tamanho errado."""
+        with self.assertRaises(ValueError):
+            from_columnar({'columns': ['a', 'b'], 'rows': [[1]]})
+        with self.assertRaises(ValueError):
+            from_columnar({'columns': [{'items': ['a']}], 'rows': [[[[1, 2]]]]})
+    
+    def test_conflicting_columns(self):
+        """Testa colunas repetidas ou que seriam valor e objeto ao mesmo tempo."""
+        for columns in [['a', 'a.b'], ['a.b', 'a'], ['a', 'a'], [{'a': ['x']}, 'a.b']]:
+            with self.subTest(columns=columns):
+                with self.assertRaises(ValueError):
+                    from_columnar({'columns': columns, 'rows': [[None, 2]]})
+
+
+class VersionCacheTest(APITestCase):
+    """Testes do cache compartilhado das versões (core.cache)."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+    
+    def test_invalidation_from_other_process(self):
+        """Testa que alterações feitas em outro processo (ex.: comandos) mudam as ETags do servidor."""
+        url = reverse('product-list')
+        etag = self.client.get(url)['ETag']
+        version = get_version('products', self.user.pk)
+        
+        code = f'import django; django.setup(); from core.cache import invalidate; invalidate("products", {self.user.pk})'
+        subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, check=True)
+        
+        self.assertGreater(get_version('products', self.user.pk), version)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_process_local_backend_rejected(self):
+        """Testa o erro de configuração com um cache de versões local ao processo."""
+        self.assertEqual(check_version_cache(None), [])
+        
+        caches = {**settings.CACHES, 'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=caches):
+            self.assertEqual([error.id for error in check_version_cache(None)], ['core.E001'])
@@ -24,6 +24,8 @@ from products.views import ProductViewSet
 from sales.views import SaleViewSet
 from purchases.views import PurchaseViewSet
 from core.auth_views import login
+from products.async_views import product_list
+from sales.async_views import sale_detail, sale_list, sale_with_status
 
 # Configuração do router para API
 router = DefaultRouter()
@@ -38,4 +40,10 @@ urlpatterns = [
     # Autenticação
     path('api/auth/login/', login, name='login'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    
+    # Leituras assíncronas (ORM async, para deploy via ASGI)
+    path('api/async/products/', product_list, name='async-product-list'),
+    path('api/async/sales/', sale_list, name='async-sale-list'),
+    path('api/async/sales/with_status/', sale_with_status, name='async-sale-with-status'),
+    path('api/async/sales/<int:pk>/', sale_detail, name='async-sale-detail'),
 ]
\ No newline at end of file
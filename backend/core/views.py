@@ -1,8 +1,9 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from core.mixins import TimingMixin
 
 
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(TimingMixin, viewsets.ModelViewSet):
     """
     ViewSet base com autenticação obrigatória.
     """
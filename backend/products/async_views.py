@@ -0,0 +1,34 @@
+"""
+Views assíncronas (somente leitura) de produtos.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from core.async_views import async_jwt_required, json_response, paginated_response, unsupported_params_response
+from core.cache import response_cache_key
+from .models import Product
+from .serializers import ProductSerializer
+
+
+@async_jwt_required
+async def product_list(request):
+    """
+    Versão async de GET /api/products/ (produtos do usuário logado, paginados).
+    
+    Usa o cache por usuário da listagem do ProductViewSet (mesma versão, invalidada
+    nas alterações de produtos), com chave própria por caminho.
+    """
+    error = unsupported_params_response(request)
+    if error is not None:
+        return error
+    
+    key = await sync_to_async(response_cache_key)('products', request.user.pk, request, 'list')
+    data = await cache.aget(key)
+    if data is not None:
+        return json_response(data)
+    
+    queryset = Product.objects.filter(user=request.user).select_related('user')
+    response = await paginated_response(request, queryset, ProductSerializer)
+    if response.status_code == 200:
+        await cache.aset(key, response.data, settings.USER_CACHE_TIMEOUT)
+    return response
@@ -0,0 +1,22 @@
+"""
+Filtros da listagem de produtos (django-filter).
+"""
+import django_filters
+from .models import Product
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filtra os produtos do usuário por faixa de preço e data de criação.
+
+    Os filtros usam os índices (user, price) e (user, -created_at, -id).
+    """
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte', help_text="Preço mínimo")
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte', help_text="Preço máximo")
+    created = django_filters.DateFromToRangeFilter(
+        field_name='created_at', help_text="Data de criação (created_after / created_before, inclusivos)"
+    )
+
+    class Meta:
+        model = Product
+        fields = ['min_price', 'max_price', 'created']
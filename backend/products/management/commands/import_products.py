@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from core.services import ImportAborted, import_products_csv
+
+
+class Command(BaseCommand):
+    """
+    Importa produtos de um arquivo CSV (colunas name e price) em streaming.
+    """
+    help = 'Importa produtos de um CSV com as colunas name e price'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Caminho do arquivo CSV')
+        parser.add_argument('--username', required=True, help='Usuário dono dos produtos')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Quantidade de produtos por INSERT')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['username']} não encontrado")
+        
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as csv_file:
+                report = import_products_csv(csv_file, user, chunk_size=options['chunk_size'])
+        except ImportAborted as e:
+            raise CommandError(f'{e.messages[0]} ({e.created} produtos já importados)')
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        except OSError as e:
+            raise CommandError(str(e))
+        
+        for error in report['errors']:
+            self.stderr.write(f"Linha {error['line']}: {'; '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} produtos importados, {report['error_count']} linhas com erro "
+            f"em {report['elapsed_seconds']}s ({report['rows_per_second']} linhas/s)"
+        ))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_alter_product_options"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="product_user_created_id_idx",
+            ),
+        ),
+    ]
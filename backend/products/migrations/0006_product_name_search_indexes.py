@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:18
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_prefix_index(apps, schema_editor):
+    """
+    Índice B-tree de prefixo do nome, na ordem do autocomplete (apenas PostgreSQL).
+
+    A collation "C" compara por bytes, o que permite buscar o prefixo com LIKE no índice;
+    o id no fim entrega a ordem (nome, id) sem Sort.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS product_user_name_prefix_idx '
+        'ON products_product (user_id, (UPPER(name) COLLATE "C"), id)'
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS product_user_name_prefix_idx")
+
+
+def create_trigram_index(apps, schema_editor):
+    """Índice GIN de trigramas para busca por trecho do nome (apenas PostgreSQL com pg_trgm)."""
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON products_product USING gin (UPPER(name) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS product_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_product_user_created_id_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,5 +1,5 @@
-from django.db import models
 from django.contrib.auth.models import User
+from django.db import models
 
 
 class Product(models.Model):
@@ -17,6 +17,12 @@ class Product(models.Model):
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
         ordering = ['-created_at']
+        # Os índices de busca por nome (products.search) são criados pela migração 0006,
+        # apenas no PostgreSQL
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='product_user_created_id_idx'),
+            models.Index(fields=['user', 'price'], name='product_user_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - R$ {self.price}"
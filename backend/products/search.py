@@ -0,0 +1,57 @@
+"""
+Busca de produtos por nome (autocomplete).
+
+A busca tem duas fases. Primeiro, os nomes que começam com o termo, em ordem alfabética,
+lidos diretamente do índice B-tree de prefixo (product_user_name_prefix_idx): o banco
+para ao atingir o limite, independentemente do tamanho do catálogo. Se faltarem
+resultados e o termo tiver ao menos MIN_SUBSTRING_LENGTH caracteres, os nomes que contêm
+o termo completam a lista, ordenados pela posição do termo e pelo tamanho do nome. No
+PostgreSQL com pg_trgm, o índice GIN de trigramas (product_name_trgm_idx) atende essa
+fase; sem ele (outros bancos ou pg_trgm indisponível), a mesma query percorre a tabela.
+"""
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Collate, Length, StrIndex, Upper
+
+
+MIN_SUBSTRING_LENGTH = 3
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def name_key():
+    """Nome em maiúsculas, na collation do índice de prefixo (ordem por bytes no PostgreSQL)."""
+    if connection.vendor == 'postgresql':
+        return Collate(Upper('name'), 'C')
+    return Upper('name')
+
+
+def search_products(queryset, term, limit=DEFAULT_LIMIT):
+    """
+    Busca produtos pelo nome, ordenados por relevância.
+
+    Args:
+        queryset: QuerySet de produtos (ex.: do usuário)
+        term: Termo buscado
+        limit: Quantidade máxima de resultados
+
+    Returns:
+        list: Produtos que começam com o termo, seguidos dos que o contêm
+    """
+    term = term.strip()
+    if not term:
+        return []
+
+    queryset = queryset.annotate(name_key=name_key())
+    prefix = queryset.filter(name_key__startswith=term.upper())
+    results = list(prefix.order_by('name_key', 'pk')[:limit])
+
+    if len(results) < limit and len(term) >= MIN_SUBSTRING_LENGTH:
+        contains = (
+            queryset.filter(name__icontains=term)
+            .exclude(name_key__startswith=term.upper())
+            .annotate(match_position=StrIndex(Upper('name'), Value(term.upper())), name_length=Length('name'))
+            .order_by('match_position', 'name_length', 'name_key', 'pk')
+        )
+        results += contains[:limit - len(results)]
+    return results
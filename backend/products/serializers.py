@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.mixins import DynamicFieldsMixin
 from .models import Product
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para produtos.
     """
@@ -13,3 +14,18 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'price', 'user', 'username', 'created_at']
         read_only_fields = ['user', 'username', 'created_at']
 
+
+class ProductAutocompleteSerializer(serializers.ModelSerializer):
+    """
+    Serializer enxuto para o autocomplete de produtos.
+    """
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'price']
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """
+    Serializer para importação de produtos via CSV.
+    """
+    file = serializers.FileField(help_text="Arquivo CSV com as colunas name e price")
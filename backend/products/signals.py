@@ -0,0 +1,21 @@
+"""
+Sinais de invalidação das versões de produtos (core.cache).
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.cache import invalidate
+from .models import Product
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_products(sender, instance, **kwargs):
+    """Invalida as respostas de produtos (cache e ETags)."""
+    invalidate('products', instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_products(sender, instance, created, update_fields=None, **kwargs):
+    """Invalida as respostas de produtos do usuário (username é serializado)."""
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate('products', instance.pk)
@@ -1,12 +1,28 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command, CommandError
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from core.services import create_entity_with_items
+from core.testing import QueryBudgetTestMixin
 from products.models import Product
 from products.serializers import ProductSerializer
+from products.views import ProductViewSet
+from purchases.models import Purchase, PurchaseItem
+from sales.models import Sale, SaleItem
 
 
 class ProductModelTest(TestCase):
@@ -195,6 +211,16 @@ class ProductViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
     
+    def test_list_products_columnar(self):
+        """Testa listagem de produtos no formato colunar."""
+        Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        
+        response = self.client.get(reverse('product-list'), {'format': 'columnar'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)['results']
+        self.assertEqual(dict(zip(results['columns'], results['rows'][0]))['name'], 'Produto 1')
+    
     def test_retrieve_product(self):
         """Testa busca de produto específico."""
         product = Product.objects.create(
@@ -244,4 +270,331 @@ class ProductViewSetTest(APITestCase):
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Product.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(Product.objects.count(), 0)
+    
+    def test_delete_product_updates_totals(self):
+        """Testa que os totais das vendas e compras com itens do produto removido são recalculados."""
+        product_a = Product.objects.create(name='Produto A', price=Decimal('10.00'), user=self.user)
+        product_b = Product.objects.create(name='Produto B', price=Decimal('5.00'), user=self.user)
+        items = [{'product_id': product_a.id, 'quantity': 2}, {'product_id': product_b.id, 'quantity': 1}]
+        sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, items)
+        purchase = create_entity_with_items(Purchase, PurchaseItem, 'purchase', self.user, items, sale_id=sale.id)
+        
+        response = self.client.delete(reverse('product-detail', kwargs={'pk': product_b.pk}))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for entity in (Sale.objects.get(pk=sale.pk), Purchase.objects.get(pk=purchase.pk)):
+            self.assertEqual(entity.total_items, 2)
+            self.assertEqual(entity.total_value, Decimal('20.00'))
+        response = self.client.get(reverse('sale-detail', kwargs={'pk': sale.pk}))
+        self.assertEqual(response.data['total_value'], Decimal('20.00'))
+        self.assertEqual(len(response.data['items']), 1)
+
+
+class ProductImportTest(APITestCase):
+    """Testes para importação de produtos via CSV."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    
+    def test_import_csv(self):
+        """Testa importação com linhas válidas e inválidas."""
+        content = 'name,price\nProduto A,10.50\n,5.00\nProduto B,abc\nProduto C,3\n'
+        csv_file = SimpleUploadedFile('produtos.csv', content.encode('utf-8'), content_type='text/csv')
+        
+        response = self.client.post(reverse('product-import-csv'), {'file': csv_file}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['error_count'], 2)
+        self.assertEqual([e['line'] for e in response.data['errors']], [3, 4])
+        self.assertIn('rows_per_second', response.data)
+        self.assertEqual(Product.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Product.objects.get(name='Produto C').price, Decimal('3.00'))
+    
+    def test_import_csv_missing_columns(self):
+        """Testa importação de CSV sem as colunas obrigatórias."""
+        csv_file = SimpleUploadedFile('produtos.csv', b'nome,valor\nProduto,1\n', content_type='text/csv')
+        
+        response = self.client.post(reverse('product-import-csv'), {'file': csv_file}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Product.objects.count(), 0)
+    
+    def test_import_csv_aborted(self):
+        """Testa arquivo inválido no meio: chunks já inseridos são mantidos, informados e visíveis."""
+        self.assertEqual(self.client.get(reverse('product-list')).data['count'], 0)
+        rows = ''.join(f'Produto {i},1.00\n' for i in range(6000))
+        tails = [(b'\xff,1.00\n', 'UTF-8'), (b'"' + b'x' * 140000 + b'",1.00\n', 'CSV inválido')]
+        for imports, (tail, message) in enumerate(tails, start=1):
+            with self.subTest(message=message):
+                content = b'name,price\n' + rows.encode() + tail
+                csv_file = SimpleUploadedFile('produtos.csv', content, content_type='text/csv')
+                
+                response = self.client.post(reverse('product-import-csv'), {'file': csv_file}, format='multipart')
+                
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(message, response.data['error'])
+                self.assertEqual(response.data['created'], 5000)
+                self.assertEqual(self.client.get(reverse('product-list')).data['count'], 5000 * imports)
+    
+    def test_import_products_command(self):
+        """Testa importação via comando em chunks."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('name,price\n')
+            for i in range(25):
+                csv_file.write(f'Produto {i},{i + 1}.99\n')
+        self.addCleanup(os.remove, csv_file.name)
+        
+        call_command('import_products', csv_file.name, '--username', 'testuser', '--chunk-size', '10', stdout=StringIO())
+        
+        self.assertEqual(Product.objects.filter(user=self.user).count(), 25)
+        
+        # CSV malformado no meio do arquivo: erro do comando, com os chunks já importados
+        with open(csv_file.name, 'a') as malformed:
+            malformed.write('"' + 'x' * 140000 + '",1.00\n')
+        with self.assertRaisesMessage(CommandError, '(20 produtos já importados)'):
+            call_command('import_products', csv_file.name, '--username', 'testuser', '--chunk-size', '10', stdout=StringIO())
+
+
+class ProductFilterTest(APITestCase):
+    """Testes dos filtros da listagem de produtos."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.cheap = Product.objects.create(name='Barato', price=Decimal('5.00'), user=self.user)
+        self.expensive = Product.objects.create(name='Caro', price=Decimal('50.00'), user=self.user)
+        self.old = Product.objects.create(name='Antigo', price=Decimal('20.00'), user=self.user)
+        Product.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=30))
+    
+    def ids(self, **params):
+        response = self.client.get(reverse('product-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {product['id'] for product in response.data['results']}
+    
+    def test_filter_by_price(self):
+        """Testa a faixa de preço (inclusiva)."""
+        self.assertEqual(self.ids(min_price='20.00'), {self.expensive.id, self.old.id})
+        self.assertEqual(self.ids(min_price='5', max_price='20'), {self.cheap.id, self.old.id})
+    
+    def test_filter_by_created(self):
+        """Testa o filtro por data de criação."""
+        today = timezone.localdate().isoformat()
+        self.assertEqual(self.ids(created_after=today), {self.cheap.id, self.expensive.id})
+        self.assertEqual(self.ids(created_before=(timezone.localdate() - timedelta(days=1)).isoformat()), {self.old.id})
+    
+    def test_invalid_filter(self):
+        """Testa valores inválidos nos filtros."""
+        response = self.client.get(reverse('product-list'), {'min_price': 'barato'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductSparseFieldsTest(APITestCase):
+    """Testes de ?fields= nas leituras de produtos."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+    
+    def test_sparse_fields(self):
+        """Testa que apenas os campos pedidos são retornados, sem carregar o usuário."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product-list'), {'fields': 'id,name'})
+        self.assertEqual(response.data['results'], [{'id': self.product.id, 'name': 'Produto 1'}])
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries))
+        
+        response = self.client.get(reverse('product-detail', kwargs={'pk': self.product.pk}), {'fields': 'username'})
+        self.assertEqual(response.data, {'username': 'testuser'})
+    
+    def test_invalid_fields(self):
+        """Testa campos desconhecidos e expansão sem campos expansíveis."""
+        self.assertEqual(self.client.get(reverse('product-list'), {'fields': 'cost'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('product-list'), {'expand': 'user'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductCacheTest(APITestCase):
+    """Testes para o cache por usuário da listagem de produtos."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.client.force_authenticate(user=self.user)
+    
+    def test_repeat_list_without_queries(self):
+        """Testa que listagens repetidas não consultam o banco."""
+        for url in (reverse('product-list'), reverse('product-my-products')):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.data, second.data)
+    
+    def test_query_params_in_key(self):
+        """Testa que parâmetros diferentes não compartilham a resposta."""
+        for i in range(25):
+            Product.objects.create(name=f'Produto extra {i}', price=Decimal('1.00'), user=self.user)
+        
+        page1 = self.client.get(reverse('product-list'))
+        page2 = self.client.get(reverse('product-list'), {'page': 2})
+        
+        self.assertNotEqual(page1.data['results'], page2.data['results'])
+    
+    def test_invalidation_on_write(self):
+        """Testa invalidação na criação, atualização e exclusão."""
+        url = reverse('product-list')
+        self.client.get(url)
+        
+        self.client.post(url, {'name': 'Produto 2', 'price': '20.00'})
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+        
+        self.client.patch(reverse('product-detail', kwargs={'pk': self.product.pk}), {'price': '15.00'})
+        response = self.client.get(url)
+        self.assertIn('15.00', [p['price'] for p in response.data['results']])
+        
+        self.client.delete(reverse('product-detail', kwargs={'pk': self.product.pk}))
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_invalidation_on_import(self):
+        """Testa invalidação na importação em lote (bulk_create não dispara sinais)."""
+        url = reverse('product-my-products')
+        self.client.get(url)
+        
+        csv_file = SimpleUploadedFile('produtos.csv', b'name,price\nProduto A,1.00\n', content_type='text/csv')
+        self.client.post(reverse('product-import-csv'), {'file': csv_file}, format='multipart')
+        
+        self.assertEqual(len(self.client.get(url).data), 2)
+    
+    def test_conditional_get(self):
+        """Testa ETag por usuário e 304 sem queries."""
+        url = reverse('product-list')
+        etag = self.client.get(url)['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        
+        self.client.force_authenticate(user=self.user)
+        self.client.patch(reverse('product-detail', kwargs={'pk': self.product.pk}), {'price': '15.00'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_cache_per_user(self):
+        """Testa que cada usuário tem seu próprio cache."""
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.get(reverse('product-my-products'))
+        
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse('product-my-products'))
+        
+        self.assertEqual(response.data, [])
+
+
+class ProductSearchTest(APITestCase):
+    """Testes da busca de produtos (autocomplete)."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('product-autocomplete')
+        for name in ['Caneta azul', 'Caderno', 'Lápis de cor', 'Estojo com caneta', 'Canetão', '100% algodão']:
+            Product.objects.create(name=name, price=Decimal('1.00'), user=self.user)
+    
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [product['name'] for product in response.data]
+    
+    def test_ranked_substring_search(self):
+        """Testa que nomes que começam com o termo vêm antes dos que o contêm."""
+        self.assertEqual(self.search(search='CANET'), ['Caneta azul', 'Canetão', 'Estojo com caneta'])
+    
+    def test_short_term_matches_prefix(self):
+        """Testa que termos curtos buscam apenas pelo início do nome."""
+        self.assertEqual(self.search(search='ca'), ['Caderno', 'Caneta azul', 'Canetão'])
+        self.assertEqual(self.search(search='de'), [])
+    
+    def test_limit(self):
+        """Testa o limite de resultados."""
+        self.assertEqual(len(self.search(search='ca', limit=2)), 2)
+        self.assertEqual(self.client.get(self.url, {'search': 'ca', 'limit': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'search': 'ca', 'limit': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_special_characters_and_empty_term(self):
+        """Testa que curingas do LIKE são tratados como texto."""
+        self.assertEqual(self.search(search='0% a'), ['100% algodão'])
+        self.assertEqual(self.search(search='   '), [])
+        self.assertEqual(self.search(), [])
+    
+    def test_only_own_products(self):
+        """Testa que a busca considera apenas os produtos do usuário."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.search(search='caneta'), [])
+    
+    def test_invalidation_on_write(self):
+        """Testa que o resultado em cache é invalidado ao criar produtos."""
+        self.assertEqual(self.search(search='borracha'), [])
+        Product.objects.create(name='Borracha', price=Decimal('1.00'), user=self.user)
+        self.assertEqual(self.search(search='borracha'), ['Borracha'])
+
+
+class ProductQueryBudgetTest(QueryBudgetTestMixin, APITestCase):
+    """Testes do orçamento de queries do ProductViewSet."""
+    viewset = ProductViewSet
+    budget_requests = {
+        'list': lambda self: ('get', reverse('product-list'), {}),
+        'retrieve': lambda self: ('get', reverse('product-detail', kwargs={'pk': self.product.pk}), {}),
+        'create': lambda self: ('post', reverse('product-list'), {'data': {'name': 'Novo', 'price': '1.00'}}),
+        'update': lambda self: (
+            'put', reverse('product-detail', kwargs={'pk': self.product.pk}), {'data': {'name': 'Produto', 'price': '2.00'}}
+        ),
+        'partial_update': lambda self: (
+            'patch', reverse('product-detail', kwargs={'pk': self.product.pk}), {'data': {'price': '3.00'}}
+        ),
+        'destroy': lambda self: ('delete', reverse('product-detail', kwargs={'pk': self.create_product().pk}), {}),
+        'my_products': lambda self: ('get', reverse('product-my-products'), {}),
+        'autocomplete': lambda self: ('get', reverse('product-autocomplete'), {'data': {'search': 'prod', 'limit': 50}}),
+        'import_csv': lambda self: ('post', reverse('product-import-csv'), {
+            'data': {'file': SimpleUploadedFile('produtos.csv', b'name,price\nProduto A,1.00\nProduto B,2.00\n')},
+            'format': 'multipart'
+        }),
+    }
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.product = self.create_product()
+        self.client.force_authenticate(user=self.user)
+    
+    def create_product(self):
+        return Product.objects.create(name='Produto', price=Decimal('10.00'), user=self.user)
+    
+    def grow(self):
+        Product.objects.bulk_create([
+            Product(name=f'Produto {i}', price=Decimal('1.00') + i, user=self.user) for i in range(30)
+        ])
+    
+    def test_query_budgets(self):
+        """Testa o orçamento de queries de todas as ações em duas escalas."""
+        self.assert_query_budgets()
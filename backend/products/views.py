@@ -1,25 +1,86 @@
+import codecs
+from django.core.exceptions import ValidationError
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.mixins import ConditionalMixin, SparseFieldsMixin, UserCacheMixin
 from core.views import BaseViewSet
+from core.services import import_products_csv
+from .filters import ProductFilter
 from .models import Product
-from .serializers import ProductSerializer
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search_products
+from .serializers import ProductSerializer, ProductAutocompleteSerializer, ProductImportSerializer
 
 
-class ProductViewSet(BaseViewSet):
+class ProductViewSet(ConditionalMixin, UserCacheMixin, SparseFieldsMixin, BaseViewSet):
     """
     ViewSet para gerenciar produtos.
+    
+    list, my_products e autocomplete ficam em cache por usuário, invalidado a cada alteração de produto;
+    list e retrieve respondem a GET condicional (ETag / Last-Modified). As leituras
+    aceitam ?fields= (SparseFieldsMixin).
     """
     serializer_class = ProductSerializer
+    filterset_class = ProductFilter
+    cache_namespace = 'products'
+    condition_namespaces = ['products']
+    condition_per_user = True
+    query_budgets = {
+        'list': 2, 'retrieve': 1, 'create': 1, 'update': 2, 'partial_update': 2, 'destroy': 8,
+        'my_products': 1, 'import_csv': 1, 'autocomplete': 2,
+    }
     
     def get_queryset(self):
         """Retorna produtos do usuário logado"""
-        return Product.objects.filter(user=self.request.user)
+        queryset = Product.objects.filter(user=self.request.user)
+        if self.is_field_requested('username'):
+            queryset = queryset.select_related('user')
+        return queryset
     
     @action(detail=False, methods=['get'])
     def my_products(self, request):
         """
         Retorna produtos criados pelo usuário logado.
         """
-        products = Product.objects.filter(user=request.user)
+        return self.cached_response(self.list_my_products, request)
+    
+    def list_my_products(self, request):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'], serializer_class=ProductAutocompleteSerializer)
+    def autocomplete(self, request):
+        """
+        Busca produtos do usuário pelo nome (?search=), ordenados por relevância e limitados (?limit=).
+        """
+        return self.cached_response(self.list_autocomplete, request)
+    
+    def list_autocomplete(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': f'limit deve ser um inteiro entre 1 e {MAX_LIMIT}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products = search_products(self.get_queryset().select_related(None), request.query_params.get('search', ''), limit)
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'], serializer_class=ProductImportSerializer)
+    def import_csv(self, request):
+        """
+        Importa produtos de um arquivo CSV (colunas name e price) para o usuário logado.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        lines = codecs.iterdecode(serializer.validated_data['file'], 'utf-8-sig')
+        try:
+            report = import_products_csv(lines, request.user)
+        except ValidationError as e:
+            # Produtos de chunks inseridos antes do erro são mantidos
+            return Response(
+                {'error': e.messages[0], 'created': getattr(e, 'created', 0)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report, status=status.HTTP_201_CREATED)
@@ -1,11 +1,16 @@
 from django.contrib import admin
 from .models import Purchase, PurchaseItem
-from core.admin import ItemAdminMixin
+from core.admin import EntityAdminMixin, ItemAdminMixin
 
 
-class PurchaseAdmin(admin.ModelAdmin):
+class PurchaseAdmin(EntityAdminMixin):
+    parent_field = 'purchase'
     list_display = ['id', 'user', 'sale', 'date']
     search_fields = ['user__username', 'sale__id']
+    
+    def get_readonly_fields(self, request, obj=None):
+        """A venda não muda depois da criação (o atendimento já foi contabilizado nela)."""
+        return ['sale'] if obj else []
 
 
 class PurchaseItemAdmin(ItemAdminMixin):
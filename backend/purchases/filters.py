@@ -0,0 +1,21 @@
+"""
+Filtros da listagem de compras (django-filter).
+"""
+import django_filters
+from .models import Purchase
+
+
+class PurchaseFilter(django_filters.FilterSet):
+    """
+    Filtra compras por venda atendida, período (?date_after=&date_before=), usuário e produto.
+
+    Os filtros usam os índices (sale, -date), (user, -date, -id), (-date, -id) e de PurchaseItem.product.
+    """
+    sale = django_filters.NumberFilter(field_name='sale_id', help_text="ID da venda atendida")
+    date = django_filters.DateFromToRangeFilter(help_text="Data da compra (date_after / date_before, inclusivos)")
+    user = django_filters.NumberFilter(field_name='user_id', help_text="ID do usuário que criou a compra")
+    product = django_filters.NumberFilter(field_name='items__product_id', help_text="ID de um produto da compra")
+
+    class Meta:
+        model = Purchase
+        fields = ['sale', 'date', 'user', 'product']
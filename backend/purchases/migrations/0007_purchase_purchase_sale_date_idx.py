@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("purchases", "0006_purchase_purchase_date_id_idx"),
+        ("sales", "0007_sale_sale_date_id_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(fields=["sale", "-date"], name="purchase_sale_date_idx"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("purchases", "0007_purchase_purchase_sale_date_idx"),
+        ("sales", "0009_sale_sale_user_date_id_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                fields=["user", "-date", "-id"], name="purchase_user_date_id_idx"
+            ),
+        ),
+    ]
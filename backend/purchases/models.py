@@ -2,10 +2,10 @@ from django.db import models
 from django.contrib.auth.models import User
 from products.models import Product
 from sales.models import Sale
-from core.mixins import SubtotalMixin
+from core.mixins import SubtotalMixin, TotalsMixin
 
 
-class Purchase(models.Model):
+class Purchase(TotalsMixin, models.Model):
     """
     Modelo que representa uma compra no sistema.
     
@@ -15,24 +15,21 @@ class Purchase(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, help_text="Usuário que criou a compra")
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='purchases', help_text="Venda que esta compra está atendendo")
     date = models.DateTimeField(auto_now_add=True, help_text="Data e hora da criação da compra")
+    total_items = models.PositiveIntegerField(default=0, help_text="Quantidade total de itens da compra")
+    total_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Valor total da compra em reais")
 
     class Meta:
         verbose_name = "Compra"
         verbose_name_plural = "Compras"
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='purchase_date_id_idx'),
+            models.Index(fields=['sale', '-date'], name='purchase_sale_date_idx'),
+            models.Index(fields=['user', '-date', '-id'], name='purchase_user_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"Compra #{self.id} - {self.user.username}"
-    
-    @property
-    def total_value(self):
-        """Calcula o valor total da compra"""
-        return sum(item.subtotal for item in self.items.all())
-    
-    @property
-    def total_items(self):
-        """Retorna o total de itens na compra"""
-        return sum(item.quantity for item in self.items.all())
 
 
 class PurchaseItem(SubtotalMixin, models.Model):
@@ -45,6 +42,9 @@ class PurchaseItem(SubtotalMixin, models.Model):
     purchase = models.ForeignKey(Purchase, on_delete=models.CASCADE, related_name='items', help_text="Compra à qual este item pertence")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, help_text="Produto sendo comprado")
     quantity = models.PositiveIntegerField(help_text="Quantidade do produto comprada")
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Preço unitário do produto no momento da compra")
+
+    parent_field = 'purchase'
 
     class Meta:
         verbose_name = "Item da Compra"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Purchase, PurchaseItem
+from core.mixins import DynamicFieldsMixin
 from core.services import create_entity_with_items
 from core.serializers import BaseItemSerializer
 
@@ -10,8 +11,15 @@ class PurchaseItemSerializer(BaseItemSerializer):
         model = PurchaseItem
 
 
-class PurchaseSerializer(serializers.ModelSerializer):
+def expanded_sale():
+    """Venda atendida resumida, no lugar do ID (?expand=sale)."""
+    from sales.serializers import SaleSummarySerializer
+    return SaleSummarySerializer(read_only=True)
+
+
+class PurchaseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para compras."""
+    expandable_fields = {'sale': expanded_sale}
     items = PurchaseItemSerializer(many=True, read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     total_value = serializers.ReadOnlyField()
@@ -20,7 +28,8 @@ class PurchaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Purchase
         fields = ['id', 'user', 'username', 'sale', 'date', 'items', 'total_value', 'total_items']
-        read_only_fields = ['user', 'username', 'date']
+        # A venda é definida na criação (CreatePurchaseSerializer), junto com o atendimento
+        read_only_fields = ['user', 'username', 'sale', 'date']
 
 
 class CreatePurchaseSerializer(serializers.Serializer):
@@ -0,0 +1,42 @@
+"""
+Sinais de invalidação das versões de compras (core.cache).
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from core.cache import invalidate
+from core.services import refresh_totals
+from products.models import Product
+from .models import Purchase, PurchaseItem
+
+
+@receiver([post_save, post_delete], sender=Purchase)
+def invalidate_purchases(sender, instance, **kwargs):
+    """Invalida as respostas de compras (cache e ETags)."""
+    invalidate('purchases', instance.user_id)
+
+
+@receiver(pre_delete, sender=Product)
+def collect_product_purchases(sender, instance, **kwargs):
+    """Guarda as compras com itens do produto, removidos em cascata sem atualizar os totais."""
+    instance._affected_purchases = list(
+        Purchase.objects.filter(items__product=instance).values_list('pk', 'user_id').distinct()
+    )
+
+
+@receiver(post_delete, sender=Product)
+def refresh_product_purchases(sender, instance, **kwargs):
+    """Recalcula os totais das compras que tinham itens do produto removido e invalida as respostas."""
+    affected = getattr(instance, '_affected_purchases', None)
+    if not affected:
+        return
+    refresh_totals(Purchase, PurchaseItem, 'purchase', [pk for pk, _ in affected])
+    for user_id in {user_id for _, user_id in affected}:
+        invalidate('purchases', user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_purchases(sender, instance, created, update_fields=None, **kwargs):
+    """Invalida as respostas de compras do usuário (username é serializado)."""
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate('purchases', instance.pk)
@@ -1,9 +1,19 @@
+import json
+from datetime import timedelta
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.columnar import from_columnar
+from core.services import create_entity_with_items
+from core.testing import QueryBudgetTestMixin
 from products.models import Product
-from sales.models import Sale
+from sales.models import Sale, SaleItem
 from purchases.models import Purchase, PurchaseItem
+from purchases.views import PurchaseViewSet
 
 
 class PurchaseModelTest(TestCase):
@@ -112,4 +122,228 @@ class PurchaseModelTest(TestCase):
         )
         
         expected_subtotal = Decimal('60.00')  # 3 * 20.00
-        self.assertEqual(item.subtotal, expected_subtotal)
\ No newline at end of file
+        self.assertEqual(item.subtotal, expected_subtotal)    
+    def test_purchase_totals_stored(self):
+        """Testa totais armazenados na compra e atualizados na remoção de itens."""
+        purchase = Purchase.objects.create(
+            sale=self.sale,
+            user=self.user
+        )
+        PurchaseItem.objects.create(purchase=purchase, product=self.product1, quantity=3)
+        item = PurchaseItem.objects.create(purchase=purchase, product=self.product2, quantity=2)
+        
+        stored = Purchase.objects.get(pk=purchase.pk)
+        self.assertEqual(stored.total_items, 5)
+        self.assertEqual(stored.total_value, Decimal('70.00'))
+        
+        item.delete()
+        
+        stored.refresh_from_db()
+        self.assertEqual(stored.total_items, 3)
+        self.assertEqual(stored.total_value, Decimal('30.00'))
+
+
+class PurchaseViewSetTest(APITestCase):
+    """Testes para PurchaseViewSet."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        
+        self.product = Product.objects.create(
+            name='Produto 1',
+            price=Decimal('10.00'),
+            user=self.user
+        )
+        
+        self.sale = Sale.objects.create(
+            user=self.user
+        )
+        
+        self.purchase = create_entity_with_items(
+            entity_model=Purchase,
+            item_model=PurchaseItem,
+            parent_field='purchase',
+            user=self.user,
+            items_data=[{'product_id': self.product.id, 'quantity': 4}],
+            sale_id=self.sale.id
+        )
+    
+    def test_export_csv(self):
+        """Testa exportação de itens de compras em CSV."""
+        response = self.client.get(reverse('purchase-export'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'purchase_id,sale_id,date,username,product_id,product_name,quantity,unit_price,subtotal')
+        self.assertTrue(lines[1].startswith(f'{self.purchase.id},{self.sale.id},'))
+        self.assertTrue(lines[1].endswith(',testuser,%d,Produto 1,4,10.00,40.00' % self.product.id))
+
+    
+    def test_list_columnar(self):
+        """Testa a listagem de compras no formato colunar."""
+        response = self.client.get(reverse('purchase-list'), {'format': 'columnar'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)['results']
+        self.assertEqual(results['rows'][0][results['columns'].index('sale')], self.sale.id)
+        self.assertEqual(from_columnar({'results': results})['results'][0]['items'][0]['quantity'], 4)
+
+class PurchaseConditionalTest(APITestCase):
+    """Testes para GET condicional (ETag / Last-Modified) de compras."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product.id, 'quantity': 2}])
+    
+    def test_etag_changes_on_purchase(self):
+        """Testa 304 e nova ETag após criação de compra."""
+        url = reverse('purchase-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.client.post(url, {'sale': self.sale.id, 'items': [{'product_id': self.product.id, 'quantity': 1}]}, format='json')
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_etag_changes_with_expanded_sale(self):
+        """Testa que vendas alteram a ETag da listagem apenas com ?expand=sale."""
+        url = reverse('purchase-list')
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': self.product.id, 'quantity': 1}], sale_id=self.sale.id
+        )
+        etag = self.client.get(url)['ETag']
+        expanded_etag = self.client.get(url, {'expand': 'sale'})['ETag']
+        
+        self.client.patch(reverse('sale-detail', kwargs={'pk': self.sale.pk}), {}, format='json')
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, {'expand': 'sale'}, HTTP_IF_NONE_MATCH=expanded_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PurchaseFilterTest(APITestCase):
+    """Testes dos filtros da listagem de compras."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product1 = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.product2 = Product.objects.create(name='Produto 2', price=Decimal('5.00'), user=self.user)
+        items = [{'product_id': self.product1.id, 'quantity': 2}, {'product_id': self.product2.id, 'quantity': 2}]
+        self.sale1 = create_entity_with_items(Sale, SaleItem, 'sale', self.user, items)
+        self.sale2 = create_entity_with_items(Sale, SaleItem, 'sale', self.user, items)
+        self.purchase1 = create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': self.product1.id, 'quantity': 1}], sale_id=self.sale1.id
+        )
+        self.purchase2 = create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.other, [{'product_id': self.product2.id, 'quantity': 1}], sale_id=self.sale2.id
+        )
+        self.url = reverse('purchase-list')
+    
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {purchase['id'] for purchase in response.data['results']}
+    
+    def test_filter_by_sale_user_and_product(self):
+        """Testa os filtros por venda, usuário e produto."""
+        self.assertEqual(self.ids(sale=self.sale1.id), {self.purchase1.id})
+        self.assertEqual(self.ids(user=self.other.id), {self.purchase2.id})
+        self.assertEqual(self.ids(product=self.product2.id), {self.purchase2.id})
+        self.assertEqual(self.ids(sale=self.sale1.id, product=self.product2.id), set())
+    
+    def test_filter_by_date(self):
+        """Testa o filtro por período."""
+        today = timezone.localdate()
+        self.assertEqual(self.ids(date_after=today.isoformat(), date_before=today.isoformat()), {self.purchase1.id, self.purchase2.id})
+        self.assertEqual(self.ids(date_after=(today + timedelta(days=1)).isoformat()), set())
+    
+    def test_invalid_filter(self):
+        """Testa valores inválidos nos filtros."""
+        self.assertEqual(self.client.get(self.url, {'sale': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PurchaseSparseFieldsTest(APITestCase):
+    """Testes de ?fields= e ?expand= nas leituras de compras."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': product.id, 'quantity': 2}])
+        create_entity_with_items(Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': product.id, 'quantity': 1}], sale_id=self.sale.id)
+    
+    def test_expand_sale(self):
+        """Testa a venda resumida no lugar do ID."""
+        response = self.client.get(reverse('purchase-list'), {'fields': 'id,sale', 'expand': 'sale'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        purchase = response.data['results'][0]
+        self.assertEqual(set(purchase), {'id', 'sale'})
+        self.assertEqual(purchase['sale']['id'], self.sale.id)
+        self.assertEqual(purchase['sale']['username'], 'testuser')
+        self.assertNotIn('items', purchase['sale'])
+    
+    def test_default_sale_is_id(self):
+        """Testa que sem expansão a venda continua como ID."""
+        response = self.client.get(reverse('purchase-list'), {'fields': 'sale,total_value'})
+        self.assertEqual(response.data['results'][0], {'sale': self.sale.id, 'total_value': Decimal('10.00')})
+
+
+class PurchaseQueryBudgetTest(QueryBudgetTestMixin, APITestCase):
+    """Testes do orçamento de queries do PurchaseViewSet."""
+    viewset = PurchaseViewSet
+    budget_requests = {
+        'list': lambda self: ('get', reverse('purchase-list'), {}),
+        'retrieve': lambda self: ('get', reverse('purchase-detail', kwargs={'pk': self.purchase.pk}), {}),
+        'create': lambda self: ('post', reverse('purchase-list'), {
+            'data': {'sale': self.sale.id, 'items': self.items_data()}, 'format': 'json'
+        }),
+        'update': lambda self: (
+            'put', reverse('purchase-detail', kwargs={'pk': self.purchase.pk}), {'data': {'sale': self.sale.id}, 'format': 'json'}
+        ),
+        'partial_update': lambda self: (
+            'patch', reverse('purchase-detail', kwargs={'pk': self.purchase.pk}), {'data': {}, 'format': 'json'}
+        ),
+        'destroy': lambda self: ('delete', reverse('purchase-detail', kwargs={'pk': self.create_purchase().pk}), {}),
+        'export': lambda self: ('get', reverse('purchase-export'), {}),
+    }
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.products = [Product.objects.create(name='Produto', price=Decimal('10.00'), user=self.user)]
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, self.items_data(quantity=100))
+        self.purchase = self.create_purchase()
+    
+    def items_data(self, quantity=1):
+        return [{'product_id': product.id, 'quantity': quantity} for product in self.products]
+    
+    def create_purchase(self):
+        return create_entity_with_items(Purchase, PurchaseItem, 'purchase', self.user, self.items_data(), sale_id=self.sale.id)
+    
+    def grow(self):
+        """Produtos de vários usuários, vendas e compras com mais itens."""
+        for i in range(5):
+            owner = User.objects.create_user(username=f'owner{i}', password='testpass123')
+            self.products.append(Product.objects.create(name=f'Produto {i}', price=Decimal('5.00'), user=owner))
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, self.items_data(quantity=100))
+        for _ in range(25):
+            self.purchase = self.create_purchase()
+    
+    def test_query_budgets(self):
+        """Testa o orçamento de queries de todas as ações em duas escalas."""
+        self.assert_query_budgets()
@@ -1,12 +1,16 @@
+from django.db.models import Prefetch
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
-from core.mixins import CreateSerializerMixin, PrefetchMixin
-from .models import Purchase
+from core.mixins import ConditionalMixin, CreateSerializerMixin, ExportMixin, PrefetchMixin, TimingMixin
+from core.services import delete_entity_with_items
+from sales.models import Sale
+from .filters import PurchaseFilter
+from .models import Purchase, PurchaseItem
 from .serializers import PurchaseSerializer, CreatePurchaseSerializer
 
 
-class PurchaseViewSet(CreateSerializerMixin, PrefetchMixin, ModelViewSet):
+class PurchaseViewSet(TimingMixin, ConditionalMixin, CreateSerializerMixin, PrefetchMixin, ExportMixin, ModelViewSet):
     """
     ViewSet para gerenciar compras.
     Permite apenas leitura e criação (não permite edição ou exclusão).
@@ -14,6 +18,33 @@ class PurchaseViewSet(CreateSerializerMixin, PrefetchMixin, ModelViewSet):
     
     queryset = Purchase.objects.all()
     serializer_class = PurchaseSerializer
+    filterset_class = PurchaseFilter
     create_serializer_class = CreatePurchaseSerializer
-    prefetch_fields = ['items__product', 'sale']
+    condition_namespaces = ['purchases', 'products']
+    expand_condition_namespaces = {'sale': ['sales']}
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'create': 10, 'update': 6, 'partial_update': 5, 'destroy': 9, 'export': 1,
+    }
+    select_related_fields = ['user']
+    prefetch_fields = [
+        Prefetch('items', queryset=PurchaseItem.objects.select_related('product__user')),
+    ]
+    expand_prefetch_fields = {'sale': [Prefetch('sale', queryset=Sale.objects.select_related('user'))]}
+    lookup_fields = {'user': ['username']}
+    export_item_model = PurchaseItem
+    export_parent_field = 'purchase'
+    export_fields = [
+        ('purchase_id', 'purchase_id'),
+        ('sale_id', 'purchase__sale_id'),
+        ('date', 'purchase__date'),
+        ('username', 'purchase__user__username'),
+        ('product_id', 'product_id'),
+        ('product_name', 'product__name'),
+        ('quantity', 'quantity'),
+        ('unit_price', 'unit_price'),
+        ('subtotal', 'subtotal_value'),
+    ]
     
+    def perform_destroy(self, instance):
+        """Remove a compra descontando as quantidades do atendimento da venda."""
+        delete_entity_with_items(instance, 'purchase')
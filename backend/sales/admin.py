@@ -1,9 +1,10 @@
 from django.contrib import admin
-from .models import Sale, SaleItem
-from core.admin import ItemAdminMixin
+from .models import Sale, SaleItem, SaleFulfillment
+from core.admin import EntityAdminMixin, ItemAdminMixin
 
 
-class SaleAdmin(admin.ModelAdmin):
+class SaleAdmin(EntityAdminMixin):
+    parent_field = 'sale'
     list_display = ['id', 'user', 'date']
     search_fields = ['user__username']
 
@@ -12,5 +13,11 @@ class SaleItemAdmin(ItemAdminMixin):
     pass
 
 
+class SaleFulfillmentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'sale', 'product', 'ordered_quantity', 'purchased_quantity']
+    search_fields = ['product__name', 'sale__id']
+
+
 admin.site.register(Sale, SaleAdmin)
 admin.site.register(SaleItem, SaleItemAdmin)
+admin.site.register(SaleFulfillment, SaleFulfillmentAdmin)
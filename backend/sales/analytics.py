@@ -0,0 +1,118 @@
+"""
+Relatórios de vendas agregados por período (dia, semana ou mês) no banco,
+a partir dos totais diários pré-agregados (SaleDailyRollup).
+"""
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from core.cache import get_version
+
+
+PERIODS = ('day', 'week', 'month')
+
+
+def current_bucket_start(period):
+    """Início (no fuso atual) do período em andamento; períodos anteriores estão fechados."""
+    today = timezone.localdate()
+    if period == 'week':
+        today -= timedelta(days=today.weekday())
+    elif period == 'month':
+        today = today.replace(day=1)
+    return timezone.make_aware(datetime.combine(today, time.min))
+
+
+def aggregate_buckets(rollups, sales, period, by_product=False):
+    """
+    Agrega receita, itens, vendas e atendimento por período (e produto) a partir dos totais diários.
+
+    Sem produto, a quantidade de vendas vem das vendas (uma venda com vários produtos
+    aparece em várias linhas dos totais diários).
+
+    Args:
+        rollups: QuerySet de SaleDailyRollup
+        sales: QuerySet de vendas do mesmo intervalo (usado apenas sem produto)
+        period: 'day', 'week' ou 'month'
+        by_product: Agrupa também por produto
+
+    Returns:
+        list: Linhas ordenadas por período (e produto)
+    """
+    group = ['bucket', 'product_id', 'product__name'] if by_product else ['bucket']
+    totals = (
+        rollups.annotate(bucket=Trunc('day', period, output_field=DateField()))
+        .values(*group)
+        .annotate(
+            revenue=Sum('revenue'),
+            items=Sum('sold_quantity'),
+            sales=Sum('sales_count'),
+            purchased=Sum('purchased_quantity'),
+        )
+        .filter(items__gt=0)
+        .order_by(*group)
+    )
+
+    sales_count = {}
+    if not by_product:
+        sales_count = dict(
+            sales.annotate(bucket=Trunc('date', period, output_field=DateField()))
+            .order_by()
+            .values('bucket')
+            .annotate(count=Count('pk'))
+            .values_list('bucket', 'count')
+        )
+
+    rows = []
+    for row in totals:
+        result = {
+            'bucket': row['bucket'],
+            'revenue': row['revenue'],
+            'items': row['items'],
+            'sales': row['sales'] if by_product else sales_count.get(row['bucket'], 0),
+            'ordered': row['items'],
+            'purchased': row['purchased'],
+            'coverage': round(row['purchased'] / row['items'] * 100, 2),
+        }
+        if by_product:
+            result['product_id'] = row['product_id']
+            result['product_name'] = row['product__name']
+        rows.append(result)
+    return rows
+
+
+def sales_analytics(rollups, sales, period, by_product=False, cache_key=None):
+    """
+    Relatório por período, com os períodos fechados em cache.
+
+    O período em andamento é sempre calculado. Os fechados são calculados uma vez por
+    versão: a chave inclui as versões de compras (atendimento) e do histórico de vendas
+    (alterações em vendas de dias anteriores, ver sales.signals).
+
+    Args:
+        rollups: QuerySet de SaleDailyRollup (já filtrado)
+        sales: QuerySet de vendas com o mesmo filtro
+        period: 'day', 'week' ou 'month'
+        by_product: Agrupa também por produto
+        cache_key: Identifica o filtro aplicado (ex.: query string); sem ele não há cache
+    """
+    boundary = current_bucket_start(period)
+
+    closed = None
+    if cache_key is not None:
+        key = 'analytics:{}:{}:{}:{}:{}:{}'.format(
+            period, by_product, boundary.isoformat(),
+            get_version('sales_history'), get_version('purchases'), cache_key
+        )
+        closed = cache.get(key)
+    if closed is None:
+        closed = aggregate_buckets(
+            rollups.filter(day__lt=boundary.date()), sales.filter(date__lt=boundary), period, by_product
+        )
+        if cache_key is not None:
+            cache.set(key, closed, settings.ANALYTICS_CACHE_TIMEOUT)
+
+    return closed + aggregate_buckets(
+        rollups.filter(day__gte=boundary.date()), sales.filter(date__gte=boundary), period, by_product
+    )
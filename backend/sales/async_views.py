@@ -0,0 +1,38 @@
+"""
+Views assíncronas (somente leitura) de vendas.
+"""
+from core.async_views import async_jwt_required, json_response, paginated_response, unsupported_params_response
+from .models import Sale
+from .serializers import SaleSerializer, SaleStatusSerializer
+from .views import ITEMS_PREFETCH
+
+
+def get_queryset():
+    """Mesmo queryset da listagem do SaleViewSet"""
+    return Sale.objects.select_related('user').prefetch_related(ITEMS_PREFETCH)
+
+
+@async_jwt_required
+async def sale_list(request):
+    """Versão async de GET /api/sales/."""
+    return await paginated_response(request, get_queryset(), SaleSerializer)
+
+
+@async_jwt_required
+async def sale_detail(request, pk):
+    """Versão async de GET /api/sales/{id}/."""
+    error = unsupported_params_response(request, supported=())
+    if error is not None:
+        return error
+    try:
+        sale = await get_queryset().aget(pk=pk)
+    except Sale.DoesNotExist:
+        return json_response({'detail': 'Não encontrado.'}, status=404)
+    return json_response(SaleSerializer(sale).data)
+
+
+@async_jwt_required
+async def sale_with_status(request):
+    """Versão async de GET /api/sales/with_status/ (paginada, sem ?stream)."""
+    queryset = get_queryset().prefetch_related('fulfillments')
+    return await paginated_response(request, queryset, SaleStatusSerializer)
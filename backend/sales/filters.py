@@ -0,0 +1,34 @@
+"""
+Filtros da listagem de vendas (django-filter).
+"""
+import django_filters
+from .models import Sale
+
+
+class SaleFilter(django_filters.FilterSet):
+    """
+    Filtra vendas por período (?date_after=&date_before=), usuário e produto.
+
+    Os filtros usam os índices (user, -date, -id), (-date, -id) e de SaleItem.product.
+    """
+    date = django_filters.DateFromToRangeFilter(help_text="Data da venda (date_after / date_before, inclusivos)")
+    user = django_filters.NumberFilter(field_name='user_id', help_text="ID do usuário que criou a venda")
+    product = django_filters.NumberFilter(field_name='items__product_id', help_text="ID de um produto da venda")
+
+    class Meta:
+        model = Sale
+        fields = ['date', 'user', 'product']
+
+    def filter_rollups(self, rollups):
+        """Aplica os mesmos filtros aos totais diários (SaleDailyRollup) do relatório."""
+        data = self.form.cleaned_data
+        if data.get('date'):
+            if data['date'].start:
+                rollups = rollups.filter(day__gte=data['date'].start.date())
+            if data['date'].stop:
+                rollups = rollups.filter(day__lte=data['date'].stop.date())
+        if data.get('user') is not None:
+            rollups = rollups.filter(user_id=data['user'])
+        if data.get('product') is not None:
+            rollups = rollups.filter(product_id=data['product'])
+        return rollups
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from sales.models import Sale, SaleItem, SaleFulfillment
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói a tabela SaleFulfillment a partir dos itens de vendas e compras.
+    
+    Processa as vendas em chunks. Com --check, apenas informa as divergências.
+    """
+    help = 'Reconstrói (ou verifica, com --check) o atendimento das vendas em chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Quantidade de vendas por chunk')
+        parser.add_argument('--check', action='store_true', help='Apenas verifica divergências, sem alterar dados')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        check = options['check']
+        
+        sale_ids = Sale.objects.order_by('pk').values_list('pk', flat=True)
+        checked = drifted = 0
+        chunk = []
+        for sale_id in sale_ids.iterator(chunk_size=chunk_size):
+            chunk.append(sale_id)
+            if len(chunk) == chunk_size:
+                drifted += self.process_chunk(chunk, check)
+                checked += len(chunk)
+                chunk = []
+        if chunk:
+            drifted += self.process_chunk(chunk, check)
+            checked += len(chunk)
+        
+        if check and drifted:
+            raise CommandError(f'{drifted} de {checked} vendas com atendimento divergente')
+        
+        action = 'verificadas' if check else 'reconstruídas'
+        self.stdout.write(self.style.SUCCESS(f'{checked} vendas {action}, {drifted} com divergência'))
+
+    def process_chunk(self, sale_ids, check):
+        """Compara o atendimento de um chunk de vendas e o reconstrói se necessário."""
+        purchased = Sale.get_purchased_quantities(sale_ids)
+        expected = {
+            (sale_id, product_id): (quantity, purchased.get(sale_id, {}).get(product_id, 0))
+            for sale_id, product_id, quantity in SaleItem.objects.filter(sale_id__in=sale_ids)
+            .values_list('sale_id', 'product_id', 'quantity')
+        }
+        current = {
+            (sale_id, product_id): (ordered, purchased_qty)
+            for sale_id, product_id, ordered, purchased_qty in SaleFulfillment.objects.filter(sale_id__in=sale_ids)
+            .values_list('sale_id', 'product_id', 'ordered_quantity', 'purchased_quantity')
+        }
+        
+        drifted_sales = {key[0] for key in expected.keys() | current.keys() if expected.get(key) != current.get(key)}
+        if drifted_sales and not check:
+            with transaction.atomic():
+                SaleFulfillment.objects.filter(sale_id__in=drifted_sales).delete()
+                SaleFulfillment.objects.bulk_create([
+                    SaleFulfillment(sale_id=sale_id, product_id=product_id, ordered_quantity=ordered, purchased_quantity=purchased_qty)
+                    for (sale_id, product_id), (ordered, purchased_qty) in expected.items()
+                    if sale_id in drifted_sales
+                ])
+        return len(drifted_sales)
@@ -0,0 +1,109 @@
+from datetime import datetime, time, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DateField, F, Min, Max, Sum
+from django.db.models.functions import Least, Trunc
+from django.utils import timezone
+from core.cache import invalidate
+from sales.models import Sale, SaleItem, SaleFulfillment, SaleDailyRollup
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói os totais diários (SaleDailyRollup) a partir dos itens e do atendimento das vendas.
+
+    Processa intervalos de dias em chunks; cada intervalo é reconstruído em uma transação.
+    Com --check, apenas informa as divergências.
+    """
+    help = 'Reconstrói (ou verifica, com --check) os totais diários das vendas em chunks de dias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Quantidade de dias por chunk')
+        parser.add_argument('--check', action='store_true', help='Apenas verifica divergências, sem alterar dados')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        check = options['check']
+        if days < 1:
+            raise CommandError('--days deve ser positivo')
+
+        bounds = Sale.objects.aggregate(first=Min('date'), last=Max('date'))
+        first = timezone.localdate(bounds['first']) if bounds['first'] else timezone.localdate()
+        last = timezone.localdate(bounds['last']) if bounds['last'] else first
+
+        # Totais de dias sem vendas também são verificados (ex.: vendas removidas fora do serviço)
+        rollup_bounds = SaleDailyRollup.objects.aggregate(first=Min('day'), last=Max('day'))
+        first = min(filter(None, [first, rollup_bounds['first']]))
+        last = max(filter(None, [last, rollup_bounds['last']]))
+
+        checked = drifted = 0
+        start = first
+        while start <= last:
+            end = min(start + timedelta(days=days), last + timedelta(days=1))
+            drifted += self.process_chunk(start, end, check)
+            checked += (end - start).days
+            start = end
+
+        if check and drifted:
+            raise CommandError(f'{drifted} totais diários divergentes em {checked} dias')
+        if drifted and not check:
+            invalidate('sales_history')
+
+        action = 'verificados' if check else 'reconstruídos'
+        self.stdout.write(self.style.SUCCESS(f'{checked} dias {action}, {drifted} totais com divergência'))
+
+    def process_chunk(self, start, end, check):
+        """Compara os totais diários de [start, end) com os itens e os reconstrói se necessário."""
+        date_range = {
+            'sale__date__gte': timezone.make_aware(datetime.combine(start, time.min)),
+            'sale__date__lt': timezone.make_aware(datetime.combine(end, time.min)),
+        }
+        group = ['sale__user_id', 'product_id', 'day']
+
+        expected = {
+            (row['sale__user_id'], row['product_id'], row['day']): (
+                row['sold_quantity'], row['revenue'], row['sales_count'], 0
+            )
+            for row in SaleItem.objects.filter(**date_range)
+            .annotate(day=Trunc('sale__date', 'day', output_field=DateField()))
+            .values(*group)
+            .annotate(
+                sold_quantity=Sum('quantity'),
+                revenue=Sum(F('quantity') * F('unit_price')),
+                sales_count=Count('sale_id'),
+            )
+            .order_by()
+        }
+        purchased = (
+            SaleFulfillment.objects.filter(**date_range)
+            .annotate(day=Trunc('sale__date', 'day', output_field=DateField()))
+            .values(*group)
+            .annotate(purchased_quantity=Sum(Least('purchased_quantity', 'ordered_quantity')))
+            .order_by()
+        )
+        for row in purchased:
+            key = (row['sale__user_id'], row['product_id'], row['day'])
+            if key in expected:
+                expected[key] = expected[key][:3] + (row['purchased_quantity'],)
+
+        rollups = SaleDailyRollup.objects.filter(day__gte=start, day__lt=end)
+        current = {
+            (user_id, product_id, day): (sold_quantity, revenue, sales_count, purchased_quantity)
+            for user_id, product_id, day, sold_quantity, revenue, sales_count, purchased_quantity in rollups.values_list(
+                'user_id', 'product_id', 'day', 'sold_quantity', 'revenue', 'sales_count', 'purchased_quantity'
+            )
+            if sold_quantity or purchased_quantity
+        }
+
+        drifted = [key for key in expected.keys() | current.keys() if expected.get(key) != current.get(key)]
+        if drifted and not check:
+            with transaction.atomic():
+                rollups.delete()
+                SaleDailyRollup.objects.bulk_create([
+                    SaleDailyRollup(
+                        user_id=user_id, product_id=product_id, day=day, sold_quantity=sold_quantity,
+                        revenue=revenue, sales_count=sales_count, purchased_quantity=purchased_quantity
+                    )
+                    for (user_id, product_id, day), (sold_quantity, revenue, sales_count, purchased_quantity) in expected.items()
+                ])
+        return len(drifted)
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_fulfillment(apps, schema_editor, chunk_size=1000):
+    """Preenche o atendimento das vendas existentes, em chunks de vendas."""
+    Sale = apps.get_model("sales", "Sale")
+    SaleItem = apps.get_model("sales", "SaleItem")
+    SaleFulfillment = apps.get_model("sales", "SaleFulfillment")
+    PurchaseItem = apps.get_model("purchases", "PurchaseItem")
+
+    def process_chunk(sale_ids):
+        purchased = {
+            (row["purchase__sale_id"], row["product_id"]): row["quantity"]
+            for row in PurchaseItem.objects.filter(purchase__sale_id__in=sale_ids)
+            .values("purchase__sale_id", "product_id")
+            .annotate(quantity=Sum("quantity"))
+            .order_by()
+        }
+        SaleFulfillment.objects.bulk_create([
+            SaleFulfillment(
+                sale_id=row["sale_id"],
+                product_id=row["product_id"],
+                ordered_quantity=row["quantity"],
+                purchased_quantity=purchased.get((row["sale_id"], row["product_id"]), 0),
+            )
+            for row in SaleItem.objects.filter(sale_id__in=sale_ids)
+            .values("sale_id", "product_id")
+            .annotate(quantity=Sum("quantity"))
+            .order_by()
+        ])
+
+    chunk = []
+    for sale_id in Sale.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=chunk_size):
+        chunk.append(sale_id)
+        if len(chunk) == chunk_size:
+            process_chunk(chunk)
+            chunk = []
+    if chunk:
+        process_chunk(chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_alter_product_options"),
+        ("purchases", "0003_alter_purchaseitem_unique_together"),
+        ("sales", "0003_alter_saleitem_unique_together"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SaleFulfillment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ordered_quantity",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Quantidade do produto vendida"
+                    ),
+                ),
+                (
+                    "purchased_quantity",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Quantidade do produto já comprada"
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        help_text="Produto da venda",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="products.product",
+                    ),
+                ),
+                (
+                    "sale",
+                    models.ForeignKey(
+                        help_text="Venda acompanhada",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fulfillments",
+                        to="sales.sale",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Atendimento da Venda",
+                "verbose_name_plural": "Atendimentos das Vendas",
+                "unique_together": {("sale", "product")},
+            },
+        ),
+        migrations.RunPython(backfill_fulfillment, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:19
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_sales(apps, schema_editor, batch_size=1000):
+    """Preenche o preço unitário dos itens e os totais das vendas existentes em lotes."""
+    Entity = apps.get_model("sales", "Sale")
+    Item = apps.get_model("sales", "SaleItem")
+    Product = apps.get_model("products", "Product")
+
+    def batched(ids):
+        batch = []
+        for pk in ids.iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # Preço unitário dos itens ainda sem snapshot
+    product_price = Product.objects.filter(pk=OuterRef("product_id")).values("price")[:1]
+    item_ids = Item.objects.filter(unit_price__isnull=True).order_by("pk").values_list("pk", flat=True)
+    for batch in batched(item_ids):
+        Item.objects.filter(pk__in=batch).update(unit_price=Subquery(product_price))
+
+    # Totais das vendas
+    items = Item.objects.filter(sale=OuterRef("pk")).order_by().values("sale")
+    total_items = items.annotate(total=Sum("quantity")).values("total")
+    total_value = items.annotate(total=Sum(F("quantity") * F("unit_price"))).values("total")
+    for batch in batched(Entity.objects.order_by("pk").values_list("pk", flat=True)):
+        Entity.objects.filter(pk__in=batch).update(
+            total_items=Coalesce(Subquery(total_items), 0),
+            total_value=Coalesce(
+                Subquery(total_value),
+                Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_alter_product_options"),
+        ("sales", "0004_salefulfillment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="total_items",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Quantidade total de itens da venda"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sale",
+            name="total_value",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Valor total da venda em reais",
+                max_digits=14,
+            ),
+        ),
+        migrations.AddField(
+            model_name="saleitem",
+            name="unit_price",
+            field=models.DecimalField(
+                decimal_places=2,
+                help_text="Preço unitário do produto no momento da venda",
+                max_digits=10,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+    ]
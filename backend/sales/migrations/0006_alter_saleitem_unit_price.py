@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0005_sale_total_items_sale_total_value_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="saleitem",
+            name="unit_price",
+            field=models.DecimalField(
+                decimal_places=2,
+                help_text="Preço unitário do produto no momento da venda",
+                max_digits=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0006_alter_saleitem_unit_price"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(fields=["-date", "-id"], name="sale_date_id_idx"),
+        ),
+    ]
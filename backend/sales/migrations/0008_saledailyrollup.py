@@ -0,0 +1,148 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:05
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, F, Max, Min, Sum
+from django.db.models.functions import Least, Trunc
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor, days=30):
+    """
+    Preenche os totais diários das vendas existentes, em chunks de dias.
+
+    As quantidades compradas vêm do atendimento (SaleFulfillment, preenchido na 0004).
+    """
+    Sale = apps.get_model("sales", "Sale")
+    SaleItem = apps.get_model("sales", "SaleItem")
+    SaleFulfillment = apps.get_model("sales", "SaleFulfillment")
+    SaleDailyRollup = apps.get_model("sales", "SaleDailyRollup")
+
+    bounds = Sale.objects.aggregate(first=Min("date"), last=Max("date"))
+    if bounds["first"] is None:
+        return
+    start = timezone.localdate(bounds["first"])
+    last = timezone.localdate(bounds["last"])
+    group = ["sale__user_id", "product_id", "day"]
+
+    while start <= last:
+        end = min(start + timedelta(days=days), last + timedelta(days=1))
+        date_range = {
+            "sale__date__gte": timezone.make_aware(datetime.combine(start, time.min)),
+            "sale__date__lt": timezone.make_aware(datetime.combine(end, time.min)),
+        }
+        purchased = {
+            (row["sale__user_id"], row["product_id"], row["day"]): row["purchased_quantity"]
+            for row in SaleFulfillment.objects.filter(**date_range)
+            .annotate(day=Trunc("sale__date", "day", output_field=DateField()))
+            .values(*group)
+            .annotate(purchased_quantity=Sum(Least("purchased_quantity", "ordered_quantity")))
+            .order_by()
+        }
+        SaleDailyRollup.objects.bulk_create([
+            SaleDailyRollup(
+                user_id=row["sale__user_id"],
+                product_id=row["product_id"],
+                day=row["day"],
+                sold_quantity=row["sold_quantity"],
+                revenue=row["revenue"],
+                sales_count=row["sales_count"],
+                purchased_quantity=purchased.get((row["sale__user_id"], row["product_id"], row["day"]), 0),
+            )
+            for row in SaleItem.objects.filter(**date_range)
+            .annotate(day=Trunc("sale__date", "day", output_field=DateField()))
+            .values(*group)
+            .annotate(
+                sold_quantity=Sum("quantity"),
+                revenue=Sum(F("quantity") * F("unit_price")),
+                sales_count=Count("sale_id"),
+            )
+            .order_by()
+        ])
+        start = end
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_product_user_created_id_idx"),
+        ("sales", "0007_sale_sale_date_id_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SaleDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(help_text="Dia das vendas")),
+                (
+                    "sold_quantity",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Quantidade vendida no dia"
+                    ),
+                ),
+                (
+                    "revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Receita do produto no dia em reais",
+                        max_digits=16,
+                    ),
+                ),
+                (
+                    "sales_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Quantidade de vendas do produto no dia"
+                    ),
+                ),
+                (
+                    "purchased_quantity",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Quantidade já comprada para as vendas do dia (limitada à vendida)",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        help_text="Produto vendido",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="products.product",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="Usuário que criou as vendas",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Total Diário de Vendas",
+                "verbose_name_plural": "Totais Diários de Vendas",
+                "indexes": [models.Index(fields=["day"], name="sale_rollup_day_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "product", "day"),
+                        name="sale_rollup_user_product_day_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0008_saledailyrollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(
+                fields=["user", "-date", "-id"], name="sale_user_date_id_idx"
+            ),
+        ),
+    ]
@@ -1,10 +1,11 @@
 from django.db import models
+from django.db.models import Sum
 from django.contrib.auth.models import User
 from products.models import Product
-from core.mixins import SubtotalMixin
+from core.mixins import SubtotalMixin, TotalsMixin
 
 
-class Sale(models.Model):
+class Sale(TotalsMixin, models.Model):
     """
     Modelo que representa uma venda no sistema.
     
@@ -13,28 +14,54 @@ class Sale(models.Model):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, help_text="Usuário que criou a venda")
     date = models.DateTimeField(auto_now_add=True, help_text="Data e hora da criação da venda")
+    total_items = models.PositiveIntegerField(default=0, help_text="Quantidade total de itens da venda")
+    total_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Valor total da venda em reais")
 
     class Meta:
         verbose_name = "Venda"
         verbose_name_plural = "Vendas"
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='sale_date_id_idx'),
+            models.Index(fields=['user', '-date', '-id'], name='sale_user_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"Venda #{self.id} - {self.user.username}"
     
-    @property
-    def total_value(self):
-        """Calcula o valor total da venda"""
-        return sum(item.subtotal for item in self.items.all())
-    
-    @property
-    def total_items(self):
-        """Retorna o total de itens na venda"""
-        return sum(item.quantity for item in self.items.all())
+    @classmethod
+    def get_purchased_quantities(cls, sale_ids):
+        """
+        Soma as quantidades compradas por venda e produto em uma única consulta agrupada.
+        Usado para reconstruir e verificar SaleFulfillment.
+        
+        Args:
+            sale_ids: IDs das vendas consultadas
+        
+        Returns:
+            dict: {sale_id: {product_id: quantidade_comprada}}
+        """
+        rows = (
+            cls.objects.filter(pk__in=sale_ids, purchases__items__isnull=False)
+            .order_by()
+            .values('pk', 'purchases__items__product_id')
+            .annotate(quantity=Sum('purchases__items__quantity'))
+        )
+        
+        purchased = {}
+        for row in rows:
+            purchased.setdefault(row['pk'], {})[row['purchases__items__product_id']] = row['quantity']
+        return purchased
     
     def get_purchase_status(self):
-        """Calcula o status de compras da venda."""
-        if not self.items.exists():
+        """
+        Calcula o status de compras da venda.
+        
+        Lê as quantidades vendidas e compradas de SaleFulfillment, mantidas na
+        criação de vendas e compras (use prefetch_related('fulfillments') em listagens).
+        """
+        fulfillments = list(self.fulfillments.all())
+        if not fulfillments:
             return {
                 'is_fully_purchased': True,
                 'purchase_progress': 100.0,
@@ -42,17 +69,8 @@ class Sale(models.Model):
                 'purchased_items': 0
             }
         
-        total_items = sum(item.quantity for item in self.items.all())
-        purchased_items = 0
-        
-        # Calcular quantidade comprada para cada produto
-        for sale_item in self.items.all():
-            purchased_qty = sum(
-                purchase_item.quantity 
-                for purchase in self.purchases.all()
-                for purchase_item in purchase.items.filter(product=sale_item.product)
-            )
-            purchased_items += purchased_qty
+        total_items = sum(f.ordered_quantity for f in fulfillments)
+        purchased_items = sum(f.purchased_quantity for f in fulfillments)
         
         purchase_progress = (purchased_items / total_items * 100) if total_items > 0 else 100.0
         is_fully_purchased = purchased_items >= total_items
@@ -75,6 +93,9 @@ class SaleItem(SubtotalMixin, models.Model):
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='items', help_text="Venda à qual este item pertence")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, help_text="Produto sendo vendido")
     quantity = models.PositiveIntegerField(help_text="Quantidade do produto vendida")
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Preço unitário do produto no momento da venda")
+
+    parent_field = 'sale'
 
     class Meta:
         verbose_name = "Item da Venda"
@@ -83,3 +104,55 @@ class SaleItem(SubtotalMixin, models.Model):
 
     def __str__(self):
         return f"{self.product.name} - Qtd: {self.quantity}"
+
+
+class SaleFulfillment(models.Model):
+    """
+    Modelo que acompanha o atendimento de um produto dentro de uma venda.
+    
+    Guarda a quantidade vendida e a quantidade já comprada de cada produto da venda.
+    É atualizado na criação de vendas e compras (core.services), evitando somar
+    todos os PurchaseItems a cada consulta de status.
+    """
+    sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='fulfillments', help_text="Venda acompanhada")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, help_text="Produto da venda")
+    ordered_quantity = models.PositiveIntegerField(default=0, help_text="Quantidade do produto vendida")
+    purchased_quantity = models.PositiveIntegerField(default=0, help_text="Quantidade do produto já comprada")
+
+    class Meta:
+        verbose_name = "Atendimento da Venda"
+        verbose_name_plural = "Atendimentos das Vendas"
+        unique_together = ['sale', 'product']
+
+    def __str__(self):
+        return f"Venda #{self.sale_id} - Produto #{self.product_id}: {self.purchased_quantity}/{self.ordered_quantity}"
+
+
+class SaleDailyRollup(models.Model):
+    """
+    Modelo com os totais diários pré-agregados das vendas por usuário e produto.
+    
+    Cada linha soma os itens vendidos em um dia (no fuso local) e a quantidade já comprada
+    para essas vendas, limitada à vendida. É atualizado na criação e remoção de vendas e
+    compras (core.services), permitindo relatórios sem percorrer os itens.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, help_text="Usuário que criou as vendas")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, help_text="Produto vendido")
+    day = models.DateField(help_text="Dia das vendas")
+    sold_quantity = models.PositiveIntegerField(default=0, help_text="Quantidade vendida no dia")
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0, help_text="Receita do produto no dia em reais")
+    sales_count = models.PositiveIntegerField(default=0, help_text="Quantidade de vendas do produto no dia")
+    purchased_quantity = models.PositiveIntegerField(default=0, help_text="Quantidade já comprada para as vendas do dia (limitada à vendida)")
+
+    class Meta:
+        verbose_name = "Total Diário de Vendas"
+        verbose_name_plural = "Totais Diários de Vendas"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product', 'day'], name='sale_rollup_user_product_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='sale_rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - Usuário #{self.user_id} - Produto #{self.product_id}: {self.sold_quantity}"
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Sale, SaleItem
-from core.services import create_entity_with_items
+from core.mixins import DynamicFieldsMixin
+from core.services import create_entity_with_items, create_entities_bulk
 from core.serializers import BaseItemSerializer
 
 
@@ -10,8 +11,20 @@ class SaleItemSerializer(BaseItemSerializer):
         model = SaleItem
 
 
-class SaleSerializer(serializers.ModelSerializer):
+def expanded_purchases():
+    """Compras da venda com os itens (?expand=purchases)."""
+    from purchases.serializers import PurchaseSerializer
+    return PurchaseSerializer(many=True, read_only=True)
+
+
+def expanded_purchase_status():
+    """Status de compras da venda (?expand=purchase_status)."""
+    return serializers.ReadOnlyField(source='get_purchase_status')
+
+
+class SaleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para vendas."""
+    expandable_fields = {'purchases': expanded_purchases, 'purchase_status': expanded_purchase_status}
     items = SaleItemSerializer(many=True, read_only=True)
     total_value = serializers.ReadOnlyField()
     total_items = serializers.ReadOnlyField()
@@ -26,6 +39,16 @@ class SaleSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'username', 'date']
 
 
+class SaleSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer resumido de vendas (sem itens), usado na expansão de compras."""
+    username = serializers.CharField(source='user.username', read_only=True)
+    
+    class Meta:
+        model = Sale
+        fields = ['id', 'user', 'username', 'date', 'total_value', 'total_items']
+        read_only_fields = fields
+
+
 class CreateSaleSerializer(serializers.Serializer):
     """Serializer para criação de vendas com itens."""
     items = serializers.ListField(
@@ -48,21 +71,53 @@ class CreateSaleSerializer(serializers.Serializer):
         )
 
 
+class BulkCreateSaleSerializer(serializers.Serializer):
+    """Serializer para criação de muitas vendas em uma única requisição."""
+    sales = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=10000,
+        help_text="Lista de vendas, cada uma com items (product_id e quantity)"
+    )
+    
+    def create(self, validated_data):
+        """Cria as vendas válidas e retorna os IDs criados e os erros por venda"""
+        user = self.context['request'].user
+        
+        return create_entities_bulk(
+            entity_model=Sale,
+            item_model=SaleItem,
+            parent_field='sale',
+            user=user,
+            entities_data=validated_data['sales']
+        )
+
+
 class SaleWithPurchasesSerializer(SaleSerializer):
     """Serializer para venda com compras relacionadas."""
-    purchases = serializers.SerializerMethodField()
+    expandable_fields = {'purchase_status': expanded_purchase_status}
+    purchases = expanded_purchases()
     
     class Meta(SaleSerializer.Meta):
         fields = SaleSerializer.Meta.fields + ['purchases']
-    
-    def get_purchases(self, obj):
-        """Retorna as compras relacionadas à venda."""
-        from purchases.serializers import PurchaseSerializer
-        return PurchaseSerializer(obj.purchases.all(), many=True).data
+
+
+class SaleAnalyticsSerializer(serializers.Serializer):
+    """Serializer para uma linha do relatório de vendas por período."""
+    bucket = serializers.DateField(help_text="Início do período")
+    product_id = serializers.IntegerField(required=False)
+    product_name = serializers.CharField(required=False)
+    revenue = serializers.DecimalField(max_digits=16, decimal_places=2, help_text="Receita no período")
+    items = serializers.IntegerField(help_text="Itens vendidos")
+    sales = serializers.IntegerField(help_text="Quantidade de vendas")
+    ordered = serializers.IntegerField(help_text="Itens a comprar")
+    purchased = serializers.IntegerField(help_text="Itens já comprados (limitados ao vendido)")
+    coverage = serializers.FloatField(help_text="Percentual dos itens vendidos já comprados")
 
 
 class SaleStatusSerializer(SaleSerializer):
     """Serializer para venda com status completo de compras."""
+    expandable_fields = {'purchases': expanded_purchases}
     purchase_status = serializers.SerializerMethodField()
     
     class Meta(SaleSerializer.Meta):
@@ -0,0 +1,47 @@
+"""
+Sinais de invalidação das versões de vendas (core.cache).
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from core.cache import invalidate
+from core.services import refresh_totals
+from products.models import Product
+from .models import Sale, SaleItem
+
+
+@receiver([post_save, post_delete], sender=Sale)
+def invalidate_sales(sender, instance, **kwargs):
+    """Invalida as respostas de vendas (cache e ETags) e, para vendas de dias anteriores, os relatórios fechados."""
+    invalidate('sales', instance.user_id)
+    if instance.date and timezone.localtime(instance.date).date() < timezone.localdate():
+        invalidate('sales_history')
+
+
+@receiver(pre_delete, sender=Product)
+def collect_product_sales(sender, instance, **kwargs):
+    """Guarda as vendas com itens do produto, removidos em cascata sem atualizar os totais."""
+    instance._affected_sales = list(
+        Sale.objects.filter(items__product=instance).values_list('pk', 'user_id').distinct()
+    )
+
+
+@receiver(post_delete, sender=Product)
+def refresh_product_sales(sender, instance, **kwargs):
+    """Recalcula os totais das vendas que tinham itens do produto removido e invalida as respostas."""
+    affected = getattr(instance, '_affected_sales', None)
+    if not affected:
+        return
+    refresh_totals(Sale, SaleItem, 'sale', [pk for pk, _ in affected])
+    for user_id in {user_id for _, user_id in affected}:
+        invalidate('sales', user_id)
+    # Os totais diários do produto também foram removidos em cascata
+    invalidate('sales_history')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_sales(sender, instance, created, update_fields=None, **kwargs):
+    """Invalida as respostas de vendas do usuário (username é serializado)."""
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate('sales', instance.pk)
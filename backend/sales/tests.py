@@ -1,8 +1,30 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+from io import StringIO
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.test import TestCase, TransactionTestCase
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.authentication import user_cache
+from core.columnar import COLUMNAR_MEDIA_TYPE, from_columnar, to_columnar
+from core.services import create_entities_bulk, create_entity_with_items, delete_entity_with_items
+from core.testing import QueryBudgetTestMixin
 from products.models import Product
-from sales.models import Sale, SaleItem
+from sales.models import Sale, SaleItem, SaleFulfillment, SaleDailyRollup
+from sales.views import SaleViewSet
+from purchases.models import Purchase, PurchaseItem
 
 
 class SaleModelTest(TestCase):
@@ -101,4 +123,979 @@ class SaleModelTest(TestCase):
         )
         
         expected_subtotal = Decimal('50.00')  # 5 * 10.00
-        self.assertEqual(item.subtotal, expected_subtotal)
\ No newline at end of file
+        self.assertEqual(item.subtotal, expected_subtotal)
+    
+    def test_sale_price_snapshot(self):
+        """Testa que alterações de preço não mudam itens e totais de vendas existentes."""
+        sale = create_entity_with_items(
+            entity_model=Sale,
+            item_model=SaleItem,
+            parent_field='sale',
+            user=self.user,
+            items_data=[
+                {'product_id': self.product1.id, 'quantity': 2},
+                {'product_id': self.product2.id, 'quantity': 1},
+            ]
+        )
+        
+        self.product1.price = Decimal('99.00')
+        self.product1.save()
+        
+        sale = Sale.objects.get(pk=sale.pk)
+        item = sale.items.get(product=self.product1)
+        
+        self.assertEqual(item.unit_price, Decimal('10.00'))
+        self.assertEqual(item.subtotal, Decimal('20.00'))
+        self.assertEqual(sale.total_items, 3)
+        self.assertEqual(sale.total_value, Decimal('40.00'))
+
+
+class SaleStatusTest(APITestCase):
+    """Testes para o status de compras das vendas."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        
+        self.product1 = Product.objects.create(
+            name='Produto 1',
+            price=Decimal('10.00'),
+            user=self.user
+        )
+        
+        self.product2 = Product.objects.create(
+            name='Produto 2',
+            price=Decimal('20.00'),
+            user=self.user
+        )
+    
+    def create_sale(self, items):
+        """Cria uma venda com itens [(produto, quantidade), ...]."""
+        return create_entity_with_items(
+            entity_model=Sale,
+            item_model=SaleItem,
+            parent_field='sale',
+            user=self.user,
+            items_data=[{'product_id': p.id, 'quantity': q} for p, q in items]
+        )
+    
+    def create_purchase(self, sale, items):
+        """Cria uma compra para a venda com itens [(produto, quantidade), ...]."""
+        return create_entity_with_items(
+            entity_model=Purchase,
+            item_model=PurchaseItem,
+            parent_field='purchase',
+            user=self.user,
+            items_data=[{'product_id': p.id, 'quantity': q} for p, q in items],
+            sale_id=sale.id
+        )
+    
+    def test_purchase_status_partial(self):
+        """Testa status de venda parcialmente comprada."""
+        sale = self.create_sale([(self.product1, 2), (self.product2, 2)])
+        self.create_purchase(sale, [(self.product1, 1)])
+        self.create_purchase(sale, [(self.product1, 1), (self.product2, 1)])
+        
+        purchase_status = sale.get_purchase_status()
+        
+        self.assertFalse(purchase_status['is_fully_purchased'])
+        self.assertEqual(purchase_status['total_items'], 4)
+        self.assertEqual(purchase_status['purchased_items'], 3)
+        self.assertEqual(purchase_status['purchase_progress'], 75.0)
+    
+    def test_purchase_status_without_items(self):
+        """Testa status de venda sem itens."""
+        sale = Sale.objects.create(user=self.user)
+        
+        purchase_status = sale.get_purchase_status()
+        
+        self.assertTrue(purchase_status['is_fully_purchased'])
+        self.assertEqual(purchase_status['purchase_progress'], 100.0)
+    
+    def test_with_status_constant_queries(self):
+        """Testa que with_status usa o mesmo número de queries independente do volume."""
+        url = reverse('sale-with-status')
+        
+        sale = self.create_sale([(self.product1, 2)])
+        self.create_purchase(sale, [(self.product1, 1)])
+        
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        for _ in range(5):
+            sale = self.create_sale([(self.product1, 3), (self.product2, 1)])
+            self.create_purchase(sale, [(self.product1, 1)])
+            self.create_purchase(sale, [(self.product1, 2), (self.product2, 1)])
+        
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.data['count'], 6)
+        fully_purchased = [s for s in response.data['results'] if s['purchase_status']['is_fully_purchased']]
+        self.assertEqual(len(fully_purchased), 5)
+    
+    def test_list_constant_queries(self):
+        """Testa que a listagem de vendas não faz queries por item ou produto."""
+        url = reverse('sale-list')
+        self.create_sale([(self.product1, 1)])
+        
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        # Produtos de usuários diferentes
+        products = []
+        for i in range(5):
+            owner = User.objects.create_user(username=f'owner{i}', password='testpass123')
+            products.append(Product.objects.create(name=f'Produto {i}', price=Decimal('5.00'), user=owner))
+        for _ in range(10):
+            self.create_sale([(product, 2) for product in products])
+        
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(len(small), len(large))
+        item = response.data['results'][0]['items'][0]
+        self.assertIn(item['product']['username'], [f'owner{i}' for i in range(5)])
+        self.assertEqual(item['unit_price'], '5.00')
+    
+    def test_list_cursor_pagination(self):
+        """Testa paginação por cursor com empates no campo de ordenação."""
+        for _ in range(45):
+            self.create_sale([(self.product1, 1)])
+        # Metade das vendas com a mesma data, para exercitar o desempate por id
+        same_date_ids = list(Sale.objects.order_by('pk').values_list('pk', flat=True)[:23])
+        Sale.objects.filter(pk__in=same_date_ids).update(date=Sale.objects.earliest('date').date)
+        
+        expected = list(Sale.objects.order_by('-date', '-pk').values_list('pk', flat=True))
+        
+        response = self.client.get(reverse('sale-list'), {'pagination': 'cursor'})
+        pages = [response.data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).data)
+        
+        self.assertIsNone(pages[0]['count'])
+        self.assertIsNone(pages[0]['previous'])
+        self.assertEqual(len(pages), 3)
+        self.assertEqual([s['id'] for page in pages for s in page['results']], expected)
+        
+        # Voltar da última página para a anterior
+        previous = self.client.get(pages[-1]['previous']).data
+        self.assertEqual([s['id'] for s in previous['results']], [s['id'] for s in pages[1]['results']])
+    
+    def test_list_invalid_cursor(self):
+        """Testa cursor inválido."""
+        cursors = ['invalido'] + [
+            base64.urlsafe_b64encode(payload).decode()
+            for payload in [
+                b'{"p": ["notadate", 1], "r": false}', b'{"p": [null, "x"], "r": false}', b'{"p": [null, 1], "r": false}',
+            ]
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('sale-list'), {'cursor': cursor})
+                
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_with_status_paginated(self):
+        """Testa paginação padrão de with_status."""
+        for _ in range(25):
+            self.create_sale([(self.product1, 1)])
+        
+        response = self.client.get(reverse('sale-with-status'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+    
+    def test_with_status_stream(self):
+        """Testa with_status em modo streaming."""
+        for _ in range(5):
+            sale = self.create_sale([(self.product1, 2)])
+            self.create_purchase(sale, [(self.product1, 2)])
+        
+        url = reverse('sale-with-status')
+        with patch.object(SaleViewSet, 'stream_chunk_size', 2):
+            response = self.client.get(url, {'stream': 'true'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 5)
+        self.assertTrue(all(s['purchase_status']['is_fully_purchased'] for s in data))
+    
+    def test_export_csv(self):
+        """Testa exportação de itens de vendas em CSV."""
+        sale = self.create_sale([(self.product1, 2), (self.product2, 1)])
+        
+        response = self.client.get(reverse('sale-export'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'sale_id,date,username,product_id,product_name,quantity,unit_price,subtotal')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith(f'{sale.id},'))
+        self.assertTrue(lines[1].endswith(f',{self.product1.id},Produto 1,2,10.00,20.00'))
+    
+    def test_export_ndjson(self):
+        """Testa exportação de itens de vendas em NDJSON."""
+        self.create_sale([(self.product1, 2)])
+        self.create_sale([(self.product2, 3)])
+        
+        response = self.client.get(reverse('sale-export'), {'export_format': 'ndjson'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['product_name'], 'Produto 2')
+        self.assertEqual(rows[1]['username'], 'testuser')
+    
+    def test_export_invalid_format(self):
+        """Testa exportação com formato inválido."""
+        response = self.client.get(reverse('sale-export'), {'export_format': 'xml'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_fulfillment_updated_on_create(self):
+        """Testa atualização do atendimento na criação de vendas e compras."""
+        sale = self.create_sale([(self.product1, 3), (self.product2, 1)])
+        self.create_purchase(sale, [(self.product1, 2)])
+        self.create_purchase(sale, [(self.product1, 1), (self.product2, 1)])
+        
+        fulfillments = {f.product_id: f for f in SaleFulfillment.objects.filter(sale=sale)}
+        
+        self.assertEqual(fulfillments[self.product1.id].ordered_quantity, 3)
+        self.assertEqual(fulfillments[self.product1.id].purchased_quantity, 3)
+        self.assertEqual(fulfillments[self.product2.id].ordered_quantity, 1)
+        self.assertEqual(fulfillments[self.product2.id].purchased_quantity, 1)
+    
+    def test_fulfillment_updated_on_purchase_delete(self):
+        """Testa desconto do atendimento na exclusão de compras."""
+        sale = self.create_sale([(self.product1, 3)])
+        purchase = self.create_purchase(sale, [(self.product1, 2)])
+        
+        url = reverse('purchase-detail', kwargs={'pk': purchase.pk})
+        response = self.client.delete(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        fulfillment = SaleFulfillment.objects.get(sale=sale, product=self.product1)
+        self.assertEqual(fulfillment.purchased_quantity, 0)
+    
+    def test_purchase_sale_not_updatable(self):
+        """Testa que a venda de uma compra não muda na atualização, mantendo o atendimento."""
+        sale = self.create_sale([(self.product1, 2)])
+        other_sale = self.create_sale([(self.product1, 2)])
+        purchase = self.create_purchase(sale, [(self.product1, 2)])
+        
+        url = reverse('purchase-detail', kwargs={'pk': purchase.pk})
+        response = self.client.patch(url, {'sale': other_sale.id}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sale'], sale.id)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).get_purchase_status()['purchased_items'], 2)
+        self.assertEqual(Sale.objects.get(pk=other_sale.pk).get_purchase_status()['purchased_items'], 0)
+    
+    def test_rebuild_fulfillment_command(self):
+        """Testa verificação e reconstrução do atendimento via comando."""
+        sale = self.create_sale([(self.product1, 2)])
+        self.create_purchase(sale, [(self.product1, 2)])
+        
+        # Item criado fora do service não atualiza o atendimento
+        SaleItem.objects.create(sale=sale, product=self.product2, quantity=4)
+        
+        with self.assertRaises(CommandError):
+            call_command('rebuild_fulfillment', '--check', stdout=StringIO())
+        
+        call_command('rebuild_fulfillment', '--chunk-size', '1', stdout=StringIO())
+        call_command('rebuild_fulfillment', '--check', stdout=StringIO())
+        
+        purchase_status = Sale.objects.get(pk=sale.pk).get_purchase_status()
+        self.assertEqual(purchase_status['total_items'], 6)
+        self.assertEqual(purchase_status['purchased_items'], 2)
+
+
+class SaleBulkCreateTest(APITestCase):
+    """Testes para criação de vendas em lote."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.product1 = Product.objects.create(
+            name='Produto 1',
+            price=Decimal('10.00'),
+            user=self.user
+        )
+        
+        self.product2 = Product.objects.create(
+            name='Produto 2',
+            price=Decimal('20.00'),
+            user=self.user
+        )
+    
+    def test_bulk_create_sales(self):
+        """Testa criação de vendas em lote com erros por venda."""
+        data = {'sales': [
+            {'items': [{'product_id': self.product1.id, 'quantity': 2}, {'product_id': self.product2.id, 'quantity': 1}]},
+            {'items': [{'product_id': 999999, 'quantity': 1}]},
+            {'items': [{'product_id': self.product2.id, 'quantity': 3}]},
+            {'items': [{'product_id': self.product1.id, 'quantity': 0}]},
+        ]}
+        
+        response = self.client.post(reverse('sale-bulk'), data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 3])
+        
+        sale = Sale.objects.get(pk=response.data['created'][0])
+        self.assertEqual(sale.user, self.user)
+        self.assertEqual(sale.total_items, 3)
+        self.assertEqual(sale.total_value, Decimal('40.00'))
+        self.assertEqual(sale.items.count(), 2)
+        self.assertEqual(sale.get_purchase_status()['total_items'], 3)
+    
+    def test_bulk_create_constant_queries(self):
+        """Testa que o número de queries não cresce com o número de vendas."""
+        def payload(count):
+            return {'sales': [
+                {'items': [{'product_id': self.product1.id, 'quantity': 1}, {'product_id': self.product2.id, 'quantity': 2}]}
+                for _ in range(count)
+            ]}
+        
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(reverse('sale-bulk'), payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(reverse('sale-bulk'), payload(50), format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Sale.objects.count(), 52)
+    
+    def test_bulk_create_all_invalid(self):
+        """Testa lote sem nenhuma venda válida."""
+        data = {'sales': [{'items': [{'product_id': 999999, 'quantity': 1}]}]}
+        
+        response = self.client.post(reverse('sale-bulk'), data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Sale.objects.count(), 0)
+
+
+class SaleConditionalTest(APITestCase):
+    """Testes para GET condicional (ETag / Last-Modified) de vendas."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product.id, 'quantity': 2}])
+    
+    def test_not_modified_without_queries(self):
+        """Testa 304 sem queries para list, retrieve e with_purchases."""
+        for url in (
+            reverse('sale-list'),
+            reverse('sale-detail', kwargs={'pk': self.sale.pk}),
+            reverse('sale-with-purchases', kwargs={'pk': self.sale.pk}),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('Last-Modified', response)
+            
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b'')
+    
+    def test_etag_changes_on_write(self):
+        """Testa que vendas, compras e produtos alteram as ETags que dependem deles."""
+        list_url = reverse('sale-list')
+        detail_url = reverse('sale-detail', kwargs={'pk': self.sale.pk})
+        purchases_url = reverse('sale-with-purchases', kwargs={'pk': self.sale.pk})
+        etags = {url: self.client.get(url)['ETag'] for url in (list_url, detail_url, purchases_url)}
+        
+        # Nova compra: apenas with_purchases muda
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': self.product.id, 'quantity': 1}], sale_id=self.sale.id
+        )
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etags[detail_url]).status_code, 304)
+        self.assertEqual(self.client.get(purchases_url, HTTP_IF_NONE_MATCH=etags[purchases_url]).status_code, 200)
+        
+        # Produto alterado: o produto é serializado nos itens
+        self.product.name = 'Produto renomeado'
+        self.product.save()
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etags[detail_url]).status_code, 200)
+        
+        # Nova venda (inclusive em lote)
+        etag = self.client.get(list_url)['ETag']
+        self.client.post(reverse('sale-bulk'), {'sales': [{'items': [{'product_id': self.product.id, 'quantity': 1}]}]}, format='json')
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_etag_changes_with_expanded_purchases(self):
+        """Testa que compras alteram as ETags das leituras com ?expand=purchases ou purchase_status."""
+        detail_url = reverse('sale-detail', kwargs={'pk': self.sale.pk})
+        params = [{'expand': 'purchase_status'}, {'expand': 'purchases'}, {'fields': 'id', 'expand': 'purchases'}]
+        etags = [self.client.get(detail_url, query)['ETag'] for query in params]
+        
+        self.client.post(
+            reverse('purchase-list'), {'sale': self.sale.id, 'items': [{'product_id': self.product.id, 'quantity': 1}]},
+            format='json'
+        )
+        
+        for query, etag in zip(params, etags):
+            with self.subTest(query=query):
+                response = self.client.get(detail_url, query, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['purchases'][0]['items'][0]['quantity'], 1)
+
+
+class SaleAnalyticsTest(APITestCase):
+    """Testes do relatório de vendas por período."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product1 = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.product2 = Product.objects.create(name='Produto 2', price=Decimal('5.00'), user=self.user)
+        self.url = reverse('sale-analytics')
+        
+        self.today = timezone.now()
+        self.past = self.today - timedelta(days=40)
+        self.old_sale = self.create_sale([(self.product1, 2), (self.product2, 4)], date=self.past)
+        self.create_sale([(self.product1, 1)], date=self.past)
+        self.create_sale([(self.product2, 3)])
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user,
+            [{'product_id': self.product1.id, 'quantity': 5}], sale_id=self.old_sale.id
+        )
+        # Vendas movidas para o passado fora do serviço: reconstruir os totais diários
+        call_command('rebuild_sales_rollup', stdout=StringIO())
+    
+    def create_sale(self, items, date=None):
+        sale = create_entity_with_items(
+            Sale, SaleItem, 'sale', self.user,
+            [{'product_id': product.id, 'quantity': quantity} for product, quantity in items]
+        )
+        if date:
+            Sale.objects.filter(pk=sale.pk).update(date=date)
+        return sale
+    
+    def test_daily_buckets(self):
+        """Testa receita, itens, vendas e atendimento por dia."""
+        response = self.client.get(self.url, {'period': 'day'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['period'], 'day')
+        
+        past, today = response.data['results']
+        self.assertEqual(past['bucket'], timezone.localdate(self.past).isoformat())
+        self.assertEqual(Decimal(past['revenue']), Decimal('50.00'))
+        self.assertEqual(past['items'], 7)
+        self.assertEqual(past['sales'], 2)
+        self.assertEqual(past['ordered'], 7)
+        self.assertEqual(past['purchased'], 2)  # compra de 5 limitada aos 2 vendidos
+        self.assertEqual(past['coverage'], round(2 / 7 * 100, 2))
+        
+        self.assertEqual(today['bucket'], timezone.localdate().isoformat())
+        self.assertEqual(Decimal(today['revenue']), Decimal('15.00'))
+        self.assertEqual(today['coverage'], 0.0)
+    
+    def test_by_product(self):
+        """Testa o agrupamento por produto."""
+        response = self.client.get(self.url, {'period': 'month', 'by': 'product'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        rows = {(row['bucket'], row['product_id']): row for row in response.data['results']}
+        past_month = timezone.localdate(self.past).replace(day=1).isoformat()
+        product1 = rows[(past_month, self.product1.id)]
+        self.assertEqual(product1['product_name'], 'Produto 1')
+        self.assertEqual(Decimal(product1['revenue']), Decimal('30.00'))
+        self.assertEqual(product1['items'], 3)
+        self.assertEqual(product1['sales'], 2)
+        self.assertEqual(product1['purchased'], 2)
+        self.assertEqual(rows[(past_month, self.product2.id)]['coverage'], 0.0)
+    
+    def test_invalid_params(self):
+        """Testa parâmetros inválidos."""
+        self.assertEqual(self.client.get(self.url, {'period': 'year'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'by': 'user'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_closed_buckets_cached(self):
+        """Testa que os períodos fechados vêm do cache até uma alteração no histórico."""
+        self.client.get(self.url)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 2)  # apenas o período em andamento
+        self.assertEqual(response.data['results'][0]['sales'], 2)
+        
+        # Alterar uma venda de dia anterior invalida os períodos fechados
+        self.client.delete(reverse('sale-detail', kwargs={'pk': self.old_sale.pk}))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['results'][0]['sales'], 1)
+        
+        # Uma nova compra altera o atendimento dos períodos fechados
+        sale = Sale.objects.filter(date__lt=timezone.now() - timedelta(days=1)).get()
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user,
+            [{'product_id': self.product1.id, 'quantity': 1}], sale_id=sale.id
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['results'][0]['coverage'], 100.0)
+
+
+class SaleFilterTest(APITestCase):
+    """Testes dos filtros da listagem e do relatório de vendas."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product1 = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.product2 = Product.objects.create(name='Produto 2', price=Decimal('5.00'), user=self.user)
+        self.sale1 = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product1.id, 'quantity': 1}])
+        self.sale2 = create_entity_with_items(Sale, SaleItem, 'sale', self.other, [
+            {'product_id': self.product1.id, 'quantity': 2},
+            {'product_id': self.product2.id, 'quantity': 3},
+        ])
+        self.old_sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product2.id, 'quantity': 4}])
+        self.past = timezone.now() - timedelta(days=10)
+        Sale.objects.filter(pk=self.old_sale.pk).update(date=self.past)
+        call_command('rebuild_sales_rollup', stdout=StringIO())
+    
+    def ids(self, url_name='sale-list', **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {sale['id'] for sale in response.data['results']}
+    
+    def test_filter_by_user_and_product(self):
+        """Testa os filtros por usuário e produto."""
+        self.assertEqual(self.ids(user=self.user.id), {self.sale1.id, self.old_sale.id})
+        self.assertEqual(self.ids(product=self.product2.id), {self.sale2.id, self.old_sale.id})
+        self.assertEqual(self.ids(user=self.user.id, product=self.product2.id), {self.old_sale.id})
+        self.assertEqual(self.ids('sale-with-status', product=self.product1.id), {self.sale1.id, self.sale2.id})
+    
+    def test_filter_by_date(self):
+        """Testa o filtro por período (datas inclusivas)."""
+        past = timezone.localdate(self.past).isoformat()
+        self.assertEqual(self.ids(date_after=past, date_before=past), {self.old_sale.id})
+        self.assertEqual(self.ids(date_after=timezone.localdate().isoformat()), {self.sale1.id, self.sale2.id})
+    
+    def test_invalid_filter(self):
+        """Testa valores inválidos nos filtros."""
+        self.assertEqual(self.client.get(reverse('sale-list'), {'date_after': 'ontem'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('sale-analytics'), {'user': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_filtered(self):
+        """Testa que a exportação respeita os filtros."""
+        response = self.client.get(reverse('sale-export'), {'user': self.other.id, 'export_format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual({row['sale_id'] for row in rows}, {self.sale2.id})
+    
+    def test_analytics_filtered(self):
+        """Testa que o relatório aplica os filtros aos totais diários."""
+        response = self.client.get(reverse('sale-analytics'), {'product': self.product2.id})
+        self.assertEqual([(row['items'], row['sales']) for row in response.data['results']], [(4, 1), (3, 1)])
+        
+        response = self.client.get(reverse('sale-analytics'), {'user': self.user.id, 'date_after': timezone.localdate().isoformat()})
+        self.assertEqual([(row['items'], row['sales']) for row in response.data['results']], [(1, 1)])
+
+
+class SaleSparseFieldsTest(APITestCase):
+    """Testes de ?fields= e ?expand= nas leituras de vendas."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product.id, 'quantity': 2}])
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': self.product.id, 'quantity': 1}], sale_id=self.sale.id
+        )
+        self.url = reverse('sale-list')
+    
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, [query['sql'] for query in queries]
+    
+    def test_default_shape_unchanged(self):
+        """Testa que sem parâmetros a resposta mantém todos os campos e nenhum expandido."""
+        data, _ = self.get(self.url)
+        self.assertEqual(
+            set(data['results'][0]), {'id', 'user', 'username', 'date', 'items', 'total_value', 'total_items'}
+        )
+    
+    def test_sparse_fields_skip_relations(self):
+        """Testa que campos fora da resposta não são consultados."""
+        data, queries = self.get(self.url, fields='id,date,total_value')
+        self.assertEqual(set(data['results'][0]), {'id', 'date', 'total_value'})
+        self.assertEqual(len(queries), 2)  # COUNT e vendas, sem usuário nem itens
+        self.assertFalse(any('sales_saleitem' in sql or 'auth_user' in sql for sql in queries))
+    
+    def test_nested_fields(self):
+        """Testa subcampos dos itens, sem carregar os produtos."""
+        data, queries = self.get(self.url, fields='id,items.product_id,items.quantity')
+        self.assertEqual(data['results'][0]['items'], [{'product_id': self.product.id, 'quantity': 2}])
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(any('products_product' in sql for sql in queries))
+    
+    def test_expand(self):
+        """Testa a expansão de status e compras, com prefetch constante."""
+        data, queries = self.get(self.url, fields='id', expand='purchase_status,purchases')
+        sale = data['results'][0]
+        self.assertEqual(set(sale), {'id', 'purchase_status', 'purchases'})
+        self.assertEqual(sale['purchase_status']['purchased_items'], 1)
+        self.assertEqual(sale['purchases'][0]['items'][0]['quantity'], 1)
+        
+        for _ in range(3):
+            create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product.id, 'quantity': 1}])
+        _, more_queries = self.get(self.url, fields='id', expand='purchase_status,purchases')
+        self.assertEqual(len(more_queries), len(queries))
+    
+    def test_detail_actions(self):
+        """Testa os parâmetros no detalhe e em with_purchases."""
+        data, _ = self.get(reverse('sale-detail', kwargs={'pk': self.sale.pk}), fields='id,total_items')
+        self.assertEqual(data, {'id': self.sale.id, 'total_items': 2})
+        
+        data, _ = self.get(reverse('sale-with-purchases', kwargs={'pk': self.sale.pk}), fields='id,purchases.id')
+        self.assertEqual(set(data), {'id', 'purchases'})
+        self.assertEqual(set(data['purchases'][0]), {'id'})
+    
+    def test_invalid_fields(self):
+        """Testa campos desconhecidos, não expansíveis ou sem subcampos."""
+        for params in [{'fields': 'id,foo'}, {'expand': 'items'}, {'fields': 'id.foo'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_writes_ignore_fields(self):
+        """Testa que escritas não descartam campos por ?fields=."""
+        response = self.client.patch(
+            reverse('sale-detail', kwargs={'pk': self.sale.pk}) + '?fields=id', {}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('items', response.data)
+
+
+class SaleColumnarFormatTest(APITestCase):
+    """Testes do formato colunar (?format=columnar) na listagem e no envio em lote."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        for quantity in range(1, 21):
+            create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product.id, 'quantity': quantity}])
+        self.url = reverse('sale-list')
+    
+    def test_list_columnar(self):
+        """Testa que a listagem colunar traz os mesmos dados, com as colunas uma vez por lista."""
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, {'format': 'columnar'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], COLUMNAR_MEDIA_TYPE)
+        data = json.loads(response.content)
+        self.assertEqual(data['count'], 20)
+        results = data['results']
+        self.assertEqual(len(results['rows']), len(plain.data['results']))
+        items_column = next(column for column in results['columns'] if isinstance(column, dict))
+        self.assertIn('product.name', items_column['items'])
+        self.assertEqual(from_columnar(data), json.loads(plain.content))
+        self.assertLess(len(response.content), len(plain.content) * 0.7)
+    
+    def test_accept_header(self):
+        """Testa a negociação pelo cabeçalho Accept."""
+        response = self.client.get(self.url, {'fields': 'id,total_items'}, HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['results']['columns'], ['id', 'total_items'])
+    
+    def test_bulk_upload_columnar(self):
+        """Testa o envio em lote no formato colunar."""
+        data = {'sales': [{'items': [{'product_id': self.product.id, 'quantity': 2}]}, {'items': [{'product_id': self.product.id, 'quantity': 3}]}]}
+        
+        response = self.client.post(
+            reverse('sale-bulk'), json.dumps(to_columnar(data)), content_type=COLUMNAR_MEDIA_TYPE
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(Sale.objects.get(pk=response.data['created'][1]).total_items, 3)
+    
+    def test_invalid_columnar_body(self):
+        """Testa linhas com quantidade de valores diferente das colunas e colunas em conflito."""
+        for body in [
+            {'sales': {'columns': ['items'], 'rows': [[[], 'extra']]}},
+            {'sales': {'columns': ['a', 'a.b'], 'rows': [[1, 2]]}},
+        ]:
+            with self.subTest(body=body):
+                response = self.client.post(reverse('sale-bulk'), json.dumps(body), content_type=COLUMNAR_MEDIA_TYPE)
+                
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Sale.objects.count(), 20)
+
+
+class SaleDailyRollupTest(TestCase):
+    """Testes dos totais diários pré-agregados (SaleDailyRollup)."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.product1 = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        self.product2 = Product.objects.create(name='Produto 2', price=Decimal('5.00'), user=self.user)
+        self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [
+            {'product_id': self.product1.id, 'quantity': 2},
+            {'product_id': self.product2.id, 'quantity': 3},
+        ])
+        create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': self.product1.id, 'quantity': 1}])
+    
+    def rollup(self, product):
+        return SaleDailyRollup.objects.get(user=self.user, product=product, day=timezone.localdate())
+    
+    def test_sales_update_rollup(self):
+        """Testa que as vendas somam quantidade, receita e vendas por produto e dia."""
+        rollup = self.rollup(self.product1)
+        self.assertEqual(rollup.sold_quantity, 3)
+        self.assertEqual(rollup.revenue, Decimal('30.00'))
+        self.assertEqual(rollup.sales_count, 2)
+        self.assertEqual(rollup.purchased_quantity, 0)
+        self.assertEqual(self.rollup(self.product2).revenue, Decimal('15.00'))
+    
+    def test_purchases_update_rollup(self):
+        """Testa que as compras somam a quantidade comprada limitada à vendida."""
+        purchase = create_entity_with_items(Purchase, PurchaseItem, 'purchase', self.user, [
+            {'product_id': self.product1.id, 'quantity': 5},
+            {'product_id': self.product2.id, 'quantity': 1},
+        ], sale_id=self.sale.id)
+        self.assertEqual(self.rollup(self.product1).purchased_quantity, 2)
+        self.assertEqual(self.rollup(self.product2).purchased_quantity, 1)
+        
+        delete_entity_with_items(purchase, 'purchase')
+        self.assertEqual(self.rollup(self.product1).purchased_quantity, 0)
+        self.assertEqual(self.rollup(self.product2).purchased_quantity, 0)
+    
+    def test_bulk_create_updates_rollup(self):
+        """Testa a criação em lote."""
+        create_entities_bulk(Sale, SaleItem, 'sale', self.user, [
+            {'items': [{'product_id': self.product1.id, 'quantity': 4}]},
+            {'items': [{'product_id': self.product1.id, 'quantity': 1}]},
+        ])
+        rollup = self.rollup(self.product1)
+        self.assertEqual(rollup.sold_quantity, 8)
+        self.assertEqual(rollup.sales_count, 4)
+    
+    def test_delete_sale_updates_rollup(self):
+        """Testa que remover a venda desconta seus itens e compras."""
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user,
+            [{'product_id': self.product1.id, 'quantity': 1}], sale_id=self.sale.id
+        )
+        delete_entity_with_items(self.sale, 'sale')
+        rollup = self.rollup(self.product1)
+        self.assertEqual(rollup.sold_quantity, 1)
+        self.assertEqual(rollup.revenue, Decimal('10.00'))
+        self.assertEqual(rollup.sales_count, 1)
+        self.assertEqual(rollup.purchased_quantity, 0)
+    
+    def test_rebuild_sales_rollup_command(self):
+        """Testa a verificação e a reconstrução dos totais diários."""
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user,
+            [{'product_id': self.product2.id, 'quantity': 2}], sale_id=self.sale.id
+        )
+        call_command('rebuild_sales_rollup', '--check', stdout=StringIO())
+        
+        expected = list(SaleDailyRollup.objects.order_by('product_id').values(
+            'product_id', 'day', 'sold_quantity', 'revenue', 'sales_count', 'purchased_quantity'
+        ))
+        SaleDailyRollup.objects.filter(product=self.product1).update(sold_quantity=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_sales_rollup', '--check', stdout=StringIO())
+        
+        call_command('rebuild_sales_rollup', '--days', '1', stdout=StringIO())
+        call_command('rebuild_sales_rollup', '--check', stdout=StringIO())
+        self.assertEqual(list(SaleDailyRollup.objects.order_by('product_id').values(
+            'product_id', 'day', 'sold_quantity', 'revenue', 'sales_count', 'purchased_quantity'
+        )), expected)
+
+
+class SaleQueryBudgetTest(QueryBudgetTestMixin, APITestCase):
+    """Testes do orçamento de queries do SaleViewSet."""
+    viewset = SaleViewSet
+    budget_requests = {
+        'list': lambda self: ('get', reverse('sale-list'), {}),
+        'retrieve': lambda self: ('get', reverse('sale-detail', kwargs={'pk': self.sale.pk}), {}),
+        'create': lambda self: ('post', reverse('sale-list'), {'data': {'items': self.items_data()}, 'format': 'json'}),
+        'update': lambda self: ('put', reverse('sale-detail', kwargs={'pk': self.sale.pk}), {'data': {}, 'format': 'json'}),
+        'partial_update': lambda self: ('patch', reverse('sale-detail', kwargs={'pk': self.sale.pk}), {'data': {}, 'format': 'json'}),
+        'destroy': lambda self: ('delete', reverse('sale-detail', kwargs={'pk': self.create_sale().pk}), {}),
+        'with_purchases': lambda self: ('get', reverse('sale-with-purchases', kwargs={'pk': self.sale.pk}), {}),
+        'bulk': lambda self: ('post', reverse('sale-bulk'), {
+            'data': {'sales': [{'items': self.items_data()} for _ in range(3)]}, 'format': 'json'
+        }),
+        'with_status': lambda self: ('get', reverse('sale-with-status'), {}),
+        'export': lambda self: ('get', reverse('sale-export'), {}),
+        'analytics': lambda self: ('get', reverse('sale-analytics'), {'data': {'period': 'week', 'by': 'product'}}),
+    }
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.products = [Product.objects.create(name='Produto', price=Decimal('10.00'), user=self.user)]
+        self.sale = self.create_sale()
+    
+    def items_data(self):
+        return [{'product_id': product.id, 'quantity': 2} for product in self.products]
+    
+    def create_sale(self):
+        """Cria uma venda com todos os produtos e uma compra parcial."""
+        sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, self.items_data())
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user,
+            [{'product_id': product.id, 'quantity': 1} for product in self.products], sale_id=sale.id
+        )
+        return sale
+    
+    def grow(self):
+        """Produtos de vários usuários, vendas com mais itens e mais compras."""
+        for i in range(5):
+            owner = User.objects.create_user(username=f'owner{i}', password='testpass123')
+            self.products.append(Product.objects.create(name=f'Produto {i}', price=Decimal('5.00'), user=owner))
+        for _ in range(25):
+            self.sale = self.create_sale()
+    
+    def test_query_budgets(self):
+        """Testa o orçamento de queries de todas as ações em duas escalas."""
+        self.assert_query_budgets()
+
+
+class SaleDailyRollupConcurrencyTest(TransactionTestCase):
+    """Testes dos totais diários com compras concorrentes da mesma venda."""
+    
+    def test_concurrent_purchases_update_rollup(self):
+        """Testa que compras simultâneas não somam mais que a quantidade vendida."""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=user)
+        sale = create_entity_with_items(Sale, SaleItem, 'sale', user, [{'product_id': product.id, 'quantity': 2}])
+        barrier = threading.Barrier(4)
+        
+        def purchase():
+            try:
+                barrier.wait()
+                create_entity_with_items(
+                    Purchase, PurchaseItem, 'purchase', user, [{'product_id': product.id, 'quantity': 2}], sale_id=sale.id
+                )
+            finally:
+                connections.close_all()
+        
+        threads = [threading.Thread(target=purchase) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        rollup = SaleDailyRollup.objects.get(user=user, product=product)
+        self.assertEqual(SaleFulfillment.objects.get(sale=sale).purchased_quantity, 8)
+        self.assertEqual(rollup.purchased_quantity, 2)
+        call_command('rebuild_sales_rollup', '--check', stdout=StringIO())
+
+
+class SaleAsyncViewsTest(TransactionTestCase):
+    """Testes das views assíncronas de leitura (mesmas respostas das views DRF)."""
+    
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        user_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        product = Product.objects.create(name='Produto 1', price=Decimal('10.00'), user=self.user)
+        for _ in range(25):
+            self.sale = create_entity_with_items(Sale, SaleItem, 'sale', self.user, [{'product_id': product.id, 'quantity': 2}])
+        create_entity_with_items(
+            Purchase, PurchaseItem, 'purchase', self.user, [{'product_id': product.id, 'quantity': 1}], sale_id=self.sale.id
+        )
+        self.auth = {'headers': {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}}
+    
+    async def test_same_response_as_sync(self):
+        """Testa que list, detail, with_status e a listagem de produtos coincidem com as views DRF."""
+        pairs = [
+            (reverse('sale-list'), reverse('async-sale-list')),
+            (reverse('sale-list') + '?page=2', reverse('async-sale-list') + '?page=2'),
+            (reverse('sale-detail', kwargs={'pk': self.sale.pk}), reverse('async-sale-detail', kwargs={'pk': self.sale.pk})),
+            (reverse('sale-with-status'), reverse('async-sale-with-status')),
+            (reverse('product-list'), reverse('async-product-list')),
+        ]
+        for sync_url, async_url in pairs:
+            sync_response = await sync_to_async(self.client.get)(sync_url, **self.auth)
+            async_response = await self.async_client.get(async_url, **self.auth)
+            
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            expected = json.loads(sync_response.content)
+            actual = json.loads(async_response.content)
+            if 'next' in expected:
+                for key in ('next', 'previous'):
+                    self.assertEqual(bool(expected[key]), bool(actual[key]))
+                    expected.pop(key), actual.pop(key)
+            self.assertEqual(actual, expected)
+    
+    async def test_authentication_required(self):
+        """Testa 401 sem token e com token inválido, e 404 para venda inexistente."""
+        response = await self.async_client.get(reverse('async-sale-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        response = await self.async_client.get(reverse('async-sale-list'), headers={'Authorization': 'Bearer invalido'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        response = await self.async_client.get(reverse('async-sale-detail', kwargs={'pk': 0}), **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = await self.async_client.get(reverse('async-sale-list') + '?page=9', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    async def test_unsupported_params(self):
+        """Testa 400 para filtros, campos e cursor, que só as views DRF suportam."""
+        for url in [
+            reverse('async-product-list') + '?min_price=3',
+            reverse('async-product-list') + '?fields=id',
+            reverse('async-sale-list') + '?pagination=cursor',
+            reverse('async-sale-detail', kwargs={'pk': self.sale.pk}) + '?expand=purchases',
+        ]:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, **self.auth)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    async def test_product_cache_not_shared(self):
+        """Testa que a listagem async de produtos não reaproveita o cache da view DRF (e vice-versa)."""
+        await sync_to_async(Product.objects.create)(name='Produto 2', price=Decimal('2.00'), user=self.user)
+        
+        await self.async_client.get(reverse('async-product-list'), **self.auth)
+        response = await sync_to_async(self.client.get)(reverse('product-list'), {'min_price': 3}, **self.auth)
+        self.assertEqual(json.loads(response.content)['count'], 1)
+        
+        response = await sync_to_async(self.client.get)(reverse('product-list'), {'fields': 'id'}, **self.auth)
+        self.assertEqual(set(json.loads(response.content)['results'][0]), {'id'})
+        response = await self.async_client.get(reverse('async-product-list'), **self.auth)
+        self.assertIn('name', json.loads(response.content)['results'][0])
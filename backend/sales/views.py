@@ -1,32 +1,146 @@
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from core.mixins import CreateSerializerMixin, PrefetchMixin
-from .models import Sale
-from .serializers import SaleSerializer, CreateSaleSerializer, SaleWithPurchasesSerializer, SaleStatusSerializer
+from core.mixins import ConditionalMixin, CreateSerializerMixin, ExportMixin, PrefetchMixin, TimingMixin
+from core.services import delete_entity_with_items
+from core.streaming import iterate_in_chunks, stream_json_array
+from purchases.models import Purchase, PurchaseItem
+from .analytics import PERIODS, sales_analytics
+from .filters import SaleFilter
+from .models import Sale, SaleDailyRollup, SaleItem
+from .serializers import (
+    SaleSerializer, CreateSaleSerializer, BulkCreateSaleSerializer,
+    SaleWithPurchasesSerializer, SaleStatusSerializer, SaleAnalyticsSerializer
+)
 
 
-class SaleViewSet(CreateSerializerMixin, PrefetchMixin, ModelViewSet):
+# Itens com produto e usuário do produto em uma única query
+ITEMS_PREFETCH = Prefetch('items', queryset=SaleItem.objects.select_related('product__user'))
+PURCHASES_PREFETCH = Prefetch('purchases', queryset=Purchase.objects.select_related('user').prefetch_related(
+    Prefetch('items', queryset=PurchaseItem.objects.select_related('product__user'))
+))
+
+
+class SaleViewSet(TimingMixin, ConditionalMixin, CreateSerializerMixin, PrefetchMixin, ExportMixin, ModelViewSet):
     """ViewSet para gerenciar vendas."""
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
+    filterset_class = SaleFilter
     create_serializer_class = CreateSaleSerializer
     custom_serializers = {
         'with_purchases': SaleWithPurchasesSerializer,
-        'status': SaleStatusSerializer
+        'with_status': SaleStatusSerializer,
+        'bulk': BulkCreateSaleSerializer,
+        'analytics': SaleAnalyticsSerializer
+    }
+    select_related_fields = ['user']
+    prefetch_fields = [ITEMS_PREFETCH]
+    action_prefetch_fields = {
+        'with_purchases': [ITEMS_PREFETCH, PURCHASES_PREFETCH],
+        'with_status': [ITEMS_PREFETCH, 'fulfillments'],
     }
-    prefetch_fields = ['items__product', 'purchases__items__product']
+    expand_prefetch_fields = {'purchases': [PURCHASES_PREFETCH], 'purchase_status': ['fulfillments']}
+    lookup_fields = {'user': ['username'], 'fulfillments': ['purchase_status']}
+    condition_namespaces = ['sales', 'products']
+    action_condition_namespaces = {'with_purchases': ['sales', 'purchases', 'products']}
+    expand_condition_namespaces = {'purchases': ['purchases'], 'purchase_status': ['purchases']}
+    stream_chunk_size = 500
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'create': 9, 'update': 5, 'partial_update': 5, 'destroy': 12,
+        'with_purchases': 4, 'bulk': 8, 'with_status': 4, 'export': 1, 'analytics': 4,
+    }
+    export_item_model = SaleItem
+    export_parent_field = 'sale'
+    export_fields = [
+        ('sale_id', 'sale_id'),
+        ('date', 'sale__date'),
+        ('username', 'sale__user__username'),
+        ('product_id', 'product_id'),
+        ('product_name', 'product__name'),
+        ('quantity', 'quantity'),
+        ('unit_price', 'unit_price'),
+        ('subtotal', 'subtotal_value'),
+    ]
+    
+    def perform_destroy(self, instance):
+        """Remove a venda descontando seus totais dos totais diários."""
+        delete_entity_with_items(instance, 'sale')
     
     @action(detail=True, methods=['get'])
     def with_purchases(self, request, pk=None):
         """Retorna uma venda com todas as compras relacionadas."""
+        return self.conditional_response(self.retrieve_with_purchases, request, pk=pk)
+    
+    def retrieve_with_purchases(self, request, pk=None):
         sale = self.get_object()
-        serializer = SaleWithPurchasesSerializer(sale)
+        serializer = self.get_serializer(sale)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Cria muitas vendas em uma única requisição.
+        
+        Vendas inválidas não impedem a criação das demais e são reportadas por índice.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+    
     @action(detail=False, methods=['get'])
     def with_status(self, request):
-        """Retorna todas as vendas com seus status de compra."""
-        sales = self.get_queryset()
-        serializer = SaleStatusSerializer(sales, many=True)
-        return Response(serializer.data)
+        """
+        Retorna as vendas com seus status de compra, paginadas.
+        
+        Com ?stream=true, retorna todas as vendas em um array JSON gerado
+        incrementalmente, em chunks de stream_chunk_size vendas.
+        """
+        sales = self.filter_queryset(self.get_queryset())
+        
+        if request.query_params.get('stream') in ('1', 'true'):
+            chunks = (
+                self.get_serializer(chunk, many=True).data
+                for chunk in iterate_in_chunks(sales, self.stream_chunk_size)
+            )
+            return StreamingHttpResponse(stream_json_array(chunks), content_type='application/json')
+        
+        page = self.paginate_queryset(sales)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(sales, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Relatório de receita, itens e atendimento por período (?period=day|week|month).
+        
+        Com ?by=product, agrupa também por produto. Aceita os filtros da listagem (SaleFilter).
+        Calculado no banco a partir dos totais diários (SaleDailyRollup), com os períodos
+        fechados em cache.
+        """
+        period = request.query_params.get('period', 'day')
+        by = request.query_params.get('by')
+        if period not in PERIODS or by not in (None, 'product'):
+            return Response(
+                {'error': f"period deve ser um de: {', '.join(PERIODS)}; by aceita apenas product"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        filterset = SaleFilter(request.query_params, queryset=Sale.objects.all(), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        
+        rollups = filterset.filter_rollups(SaleDailyRollup.objects.all())
+        cache_key = f"{request.user.pk}?{request.META.get('QUERY_STRING', '')}"
+        rows = sales_analytics(rollups, filterset.qs, period, by_product=by == 'product', cache_key=cache_key)
+        return Response({
+            'period': period,
+            'by': by,
+            'results': self.get_serializer(rows, many=True).data,
+        })